@@ -1,54 +1,198 @@
-import whois
-import requests
 import os
 import time
-import base64
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from urllib.parse import urlparse
 from datetime import datetime
 from dotenv import load_dotenv
+from whois_cache import lookup_creation_date
+import redirect_resolver
+import blocklist
+from virustotal import check_virustotal, is_pending, VIRUSTOTAL_TIMEOUT
+import metrics
 
 # .env 파일에서 환경변수 불러오기
 load_dotenv()
-VIRUSTOTAL_API_KEY = os.getenv("VIRUSTOTAL_API_KEY")
+
+# 병렬 분석 설정 (검사별 타임아웃 + 전체 마감 시간, 단위: 초)
+ANALYZE_PARALLEL = os.getenv("ANALYZE_PARALLEL", "1") == "1"
+WHOIS_TIMEOUT = float(os.getenv("WHOIS_TIMEOUT", "8"))
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "5"))
+ANALYZE_DEADLINE = float(os.getenv("ANALYZE_DEADLINE", "10"))
+
+# 검사용 스레드 풀 (요청마다 만들지 않고 워커 프로세스 단위로 공유)
+# 동시에 진행될 수 있는 분석 수(요청 스레드 + 작업 워커 + 일괄 분석) x 검사 3개만큼 두어
+# 검사가 풀 대기열에서 기다리다 타임아웃되지 않도록 함
+ANALYZE_CONCURRENCY = (
+    int(os.getenv("GUNICORN_THREADS", "8"))
+    + int(os.getenv("JOB_WORKERS", "4"))
+    + int(os.getenv("BATCH_ANALYZE_CONCURRENCY", "4"))
+)
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("ANALYZE_MAX_WORKERS", str(ANALYZE_CONCURRENCY * 3))),
+    thread_name_prefix="analyze"
+)
+
+
+def check_whois(domain):
+    """
+    WHOIS 생성일 조회 ("%Y-%m-%d %H:%M:%S" 문자열, 실패 시 None)
+    등록 도메인(eTLD+1) 단위로 캐시됨 (whois_cache 참고)
+    """
+    try:
+        with metrics.stage("whois"):
+            return lookup_creation_date(domain)
+    except Exception:
+        return None
 
 
-def check_virustotal(url):
+def check_ssl(url, timeout=None):
     """
-    VirusTotal에 URL을 제출하고 결과를 조회하는 함수
+    리다이렉트를 한 hop씩 따라가 (ssl_valid, final_url, redirect_chain) 반환
+    본문은 hop마다 앞부분만 읽음 (redirect_resolver 참고)
+    시간 안에 끝나지 않으면 ssl_valid는 None (판단 불가, 접속 실패와 구분)
     """
-    if not VIRUSTOTAL_API_KEY:
-        return "API key not set"
+    try:
+        with metrics.stage("fetch"):
+            resolved = redirect_resolver.resolve(url, timeout=timeout or FETCH_TIMEOUT)
+        if resolved.get("error") == "timeout":
+            return None, resolved["final_url"], resolved["chain"]
+        return resolved["ssl_valid"], resolved["final_url"], resolved["chain"]
+    except Exception:
+        return False, None, []
+
+
+def _check_virustotal(url, timeout=None):
+    with metrics.stage("virustotal"):
+        return check_virustotal(url, timeout)
+
 
+def label_result(result):
+    """
+    단순 판별 로직 (일부 검사가 누락된 partial 결과도 그대로 판별)
+    """
+    if result["ssl_valid"] is None:
+        # 대상 접속이 시간 초과 -> 위험으로 확정(warning 승격)하지 않고 의심으로만 표시
+        return "의심"
+    if not result["ssl_valid"]:
+        return "위험"
+    if result["whois_creation_date"]:
+        year = datetime.strptime(result["whois_creation_date"], "%Y-%m-%d %H:%M:%S").year
+        if year >= 2023:
+            return "의심"
+        return "안전"
+    return "의심"
+
+
+def _notify(progress, stage, value):
+    if progress is None:
+        return
     try:
-        # URL을 Base64로 인코딩
-        url_bytes = url.encode("utf-8")
-        url_id = base64.urlsafe_b64encode(url_bytes).decode().strip("=")
-
-        headers = {"x-apikey": VIRUSTOTAL_API_KEY}
-        # VirusTotal v3 API: GET /urls/{url_id}
-        result_url = f"https://www.virustotal.com/api/v3/urls/{url_id}"
-        response = requests.get(result_url, headers=headers)
-
-        if response.status_code == 200:
-            data = response.json()
-            stats = data["data"]["attributes"]["last_analysis_stats"]
-            malicious = stats.get("malicious", 0)
-            suspicious = stats.get("suspicious", 0)
-            harmless = stats.get("harmless", 0)
-            undetected = stats.get("undetected", 0)
-            return f"{malicious} malicious / {suspicious} suspicious / {harmless} harmless / {undetected} undetected"
-        elif response.status_code == 404:
-            return "URL not found in VT"
-        else:
-            return f"error: {response.status_code}"
+        progress(stage, value)
+    except Exception:
+        pass
+
+
+def _progress_value(name, future):
+    if future.cancelled() or future.exception():
+        return None
+    value = future.result()
+    # 대상 접속은 리다이렉트 체인을 빼고 (ssl_valid, final_url)만 알림
+    return value[:2] if name == "ssl" else value
+
+
+def _run_sequential(url, domain, result, progress=None):
+    result["whois_creation_date"] = check_whois(domain)
+    _notify(progress, "whois", result["whois_creation_date"])
+    result["ssl_valid"], result["final_url"], result["redirect_chain"] = check_ssl(url)
+    _notify(progress, "ssl", (result["ssl_valid"], result["final_url"]))
+    result["virustotal_score"] = _check_virustotal(url)
+    _notify(progress, "virustotal", result["virustotal_score"])
+    if result["ssl_valid"] is None:
+        result["partial"] = True
+        result["timed_out"] = ["ssl"]
 
-    except Exception as e:
-        return f"error: {str(e)}"
 
+class _Check:
+    """
+    풀에 제출한 검사 하나 (실제로 실행을 시작한 시점을 기록)
+    """
+
+    def __init__(self, fn, *args):
+        self.started = threading.Event()
+        self.started_at = None
+        # 요청별 단계 시간(Server-Timing)이 풀 스레드에서도 같은 요청에 합산되도록 컨텍스트 복사
+        self.future = _executor.submit(contextvars.copy_context().run, self._run, fn, *args)
+
+    def _run(self, fn, *args):
+        self.started_at = time.monotonic()
+        self.started.set()
+        return fn(*args)
+
+    def result(self, timeout, end):
+        """
+        검사별 타임아웃은 실행을 시작한 시점부터 계산 (풀 대기열에서 기다린 시간은 전체 마감 시간에만 포함)
+        마감 시간까지 시작하지 못한 검사는 취소
+        """
+        if not self.started.wait(max(0.0, end - time.monotonic())) and self.future.cancel():
+            raise FutureTimeoutError()
+        self.started.wait()
+        limit = min(end, self.started_at + timeout)
+        return self.future.result(timeout=max(0.0, limit - time.monotonic()))
+
+
+def _run_parallel(url, domain, result, deadline, progress=None):
+    """
+    WHOIS / 대상 접속 / VirusTotal을 동시에 시작하고,
+    검사별 타임아웃과 전체 마감 시간 중 먼저 도래하는 시점까지만 기다림
+    """
+    end = time.monotonic() + deadline
+    checks = {
+        "whois": (_Check(check_whois, domain), WHOIS_TIMEOUT),
+        "ssl": (_Check(check_ssl, url, FETCH_TIMEOUT), FETCH_TIMEOUT),
+        "virustotal": (_Check(_check_virustotal, url, VIRUSTOTAL_TIMEOUT), VIRUSTOTAL_TIMEOUT),
+    }
 
-def analyze_url(url):
+    # 검사가 끝나는 순서대로 진행 상황 알림
+    for name, (check, _) in checks.items():
+        check.future.add_done_callback(lambda f, name=name: _notify(progress, name, _progress_value(name, f)))
+
+    values = {}
+    timed_out = []
+    for name, (check, check_timeout) in checks.items():
+        try:
+            values[name] = check.result(check_timeout, end)
+        except FutureTimeoutError:
+            # 검사는 백그라운드에서 끝나도록 두고 결과만 버림
+            timed_out.append(name)
+            _notify(progress, f"{name}_timeout", None)
+
+    if "whois" in values:
+        result["whois_creation_date"] = values["whois"]
+    if "ssl" in values:
+        result["ssl_valid"], result["final_url"], result["redirect_chain"] = values["ssl"]
+    if result["ssl_valid"] is None or "ssl" in timed_out:
+        # 대상 접속이 끝나지 않음 (접속 실패가 아니므로 SSL 무효로 보지 않음)
+        result["ssl_valid"] = None
+        if "ssl" not in timed_out:
+            timed_out.append("ssl")
+    if "virustotal" in values:
+        result["virustotal_score"] = values["virustotal"]
+    else:
+        result["virustotal_score"] = "timeout"
+
+    if timed_out:
+        result["partial"] = True
+        result["timed_out"] = timed_out
+
+
+def analyze_url(url, parallel=None, deadline=None, progress=None):
     """
     URL을 분석하여 도메인, SSL 유효성, WHOIS 생성일, VirusTotal 결과 반환
+    :param parallel: True면 검사를 동시에 실행 (기본값: ANALYZE_PARALLEL)
+    :param deadline: 병렬 분석 전체 마감 시간(초) (기본값: ANALYZE_DEADLINE)
+    :param progress: 검사 하나가 끝날 때마다 호출되는 progress(stage, value) 콜백
     """
     result = {
         "original_url": url,
@@ -56,50 +200,42 @@ def analyze_url(url):
         "domain": None,
         "whois_creation_date": None,
         "ssl_valid": False,
+        "redirect_chain": [],
         "virustotal_score": None,
         "phishtank_result": False,
-        "label": None
+        "label": None,
+        "partial": False
     }
 
+    if parallel is None:
+        parallel = ANALYZE_PARALLEL
+
     try:
         # 1️⃣ 도메인 추출
         parsed = urlparse(url)
         domain = parsed.netloc or parsed.path
         result["domain"] = domain
 
-        # 2️⃣ WHOIS 조회
-        try:
-            w = whois.whois(domain)
-            creation_date = w.creation_date
-            if isinstance(creation_date, list):
-                creation_date = creation_date[0]
-            if creation_date:
-                result["whois_creation_date"] = creation_date.strftime("%Y-%m-%d %H:%M:%S")
-        except Exception:
-            result["whois_creation_date"] = None
-
-        # 3️⃣ SSL 유효성 검사
-        try:
-            r = requests.get(url, timeout=5, allow_redirects=True)
-            result["ssl_valid"] = r.url.startswith("https://")
-            result["final_url"] = r.url
-        except Exception:
-            result["ssl_valid"] = False
-
-        # 4️⃣ VirusTotal 검사
-        result["virustotal_score"] = check_virustotal(url)
-
-        # 5️⃣ 단순 판별 로직
-        if not result["ssl_valid"]:
+        # 로컬 차단 목록(PhishTank / URLhaus / OpenPhish)에 있으면 네트워크 조회 없이 바로 위험
+        if blocklist.contains(url):
+            result["phishtank_result"] = True
+            result["blocklist_hit"] = True
+            result["virustotal_score"] = "skipped: local blocklist hit"
             result["label"] = "위험"
-        elif result["whois_creation_date"]:
-            year = datetime.strptime(result["whois_creation_date"], "%Y-%m-%d %H:%M:%S").year
-            if year >= 2023:
-                result["label"] = "의심"
-            else:
-                result["label"] = "안전"
+            _notify(progress, "blocklist", True)
+            return result
+
+        # 2️⃣ WHOIS / SSL / VirusTotal 검사
+        if parallel:
+            _run_parallel(url, domain, result, deadline or ANALYZE_DEADLINE, progress)
         else:
-            result["label"] = "의심"
+            _run_sequential(url, domain, result, progress)
+
+        # VirusTotal 한도 초과로 조회를 미룬 경우 표시 (판정 캐시는 짧게만 보관)
+        result["virustotal_pending"] = is_pending(result["virustotal_score"])
+
+        # 3️⃣ 단순 판별 로직
+        result["label"] = label_result(result)
 
     except Exception as e:
         result["error"] = str(e)
@@ -1,16 +1,27 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from qr_decoder import decode_qr
+from qr_decoder import decode_qr, submit_decode_all, decode_cache_stats
 from analyze_url import analyze_url
+import io
 import os
 import json
-from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
-import mysql.connector
-from urllib.parse import urlparse
-import traceback
-
-print("🔥 Flask app.py import 시작됨", flush=True)
+from storage import get_storage, url_row
+import verdict_cache
+import whois_cache
+import virustotal
+from write_behind import WriteBehindQueue
+import metrics
+from logger import get_logger
+import hashlib
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from jobs import JobManager, JobQueueFull
+
+log = get_logger("app")
+log.info("🔥 Flask app.py import 시작됨")
 
 # -------------------
 # 환경 변수 로드
@@ -18,19 +29,24 @@ print("🔥 Flask app.py import 시작됨", flush=True)
 try:
     load_dotenv()
 except Exception as e:
-    print("❌ dotenv 로드 실패:", e, flush=True)
-    traceback.print_exc()
+    log.exception(f"❌ dotenv 로드 실패: {e}")
 
 # -------------------
 # Flask 서버 설정
 # -------------------
+class InMemoryRequest(Request):
+    # 업로드 이미지를 임시 파일로 내리지 않고 메모리에서 바로 디코딩
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return io.BytesIO()
+
+
 app = Flask(__name__)
+app.request_class = InMemoryRequest
 CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
-print("✅ Flask 인스턴스 생성 및 CORS 적용 완료", flush=True)
+log.info("✅ Flask 인스턴스 생성 및 CORS 적용 완료")
 
-UPLOAD_FOLDER = 'uploads'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# 업로드 전체 크기 제한 (메모리에서 처리하므로 상한 필요)
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv("MAX_UPLOAD_MB", "32")) * 1024 * 1024
 
 # -------------------
 # 기본 홈 경로 (헬스체크용)
@@ -40,161 +56,46 @@ def home():
     return jsonify({"status": "ok", "message": "QR Backend is running!"}), 200
 
 # -------------------
-# MySQL 연결 설정
+# DB 저장 함수
 # -------------------
-db_url = os.getenv("DATABASE_URL")  # Railway 내부 변수
-if not db_url:
-    raise Exception("❌ DATABASE_URL 환경 변수가 설정되어 있지 않습니다!")
-
-parsed = urlparse(db_url)
-MYSQL_CONFIG = {
-    "host": parsed.hostname,
-    "port": parsed.port or 3306,
-    "user": parsed.username,
-    "password": parsed.password,
-    "database": parsed.path.lstrip('/')
-}
-
-def get_db_connection():
-    return mysql.connector.connect(**MYSQL_CONFIG)
+# 쓰기 지연(write-behind) 모드: 분석 결과를 큐에 넣고 백그라운드에서 일괄 저장
+DB_WRITE_BEHIND = os.getenv("DB_WRITE_BEHIND", "0") == "1"
 
-# -------------------
-# DB 초기화 (테이블 자동 생성)
-# -------------------
-def init_db():
-    print("🔧 MySQL DB 초기화 시작", flush=True)
-    try:
-        conn = get_db_connection()
-        c = conn.cursor()
-
-        tables = ['reports', 'suspected', 'warning']
-        for table in tables:
-            c.execute(f'''
-                CREATE TABLE IF NOT EXISTS {table} (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    original_url VARCHAR(512) NOT NULL UNIQUE,
-                    final_url VARCHAR(512),
-                    domain VARCHAR(255),
-                    ssl_valid BOOLEAN,
-                    whois_creation_date VARCHAR(128),
-                    virustotal_score VARCHAR(128),
-                    phishtank_result BOOLEAN,
-                    label VARCHAR(16),
-                    count INT DEFAULT 1,
-                    analysis_json TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    reported_count INT DEFAULT 0
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-            ''')
-        conn.commit()
-        conn.close()
-        print("✅ MySQL 테이블 생성 완료", flush=True)
-    except Exception as e:
-        print("❌ DB 초기화 중 오류:", e, flush=True)
-        traceback.print_exc()
 
-init_db()
+def write_reports(results):
+    """
+    분석 결과 목록을 urls 테이블에 일괄 upsert로 저장
+    """
+    rows = [url_row(r) for r in results]
+    with metrics.stage("db_write"):
+        get_storage().upsert_results(rows)
+
+
+report_queue = WriteBehindQueue(
+    write_reports,
+    maxsize=int(os.getenv("DB_WRITE_QUEUE_SIZE", "1000")),
+    batch_size=int(os.getenv("DB_WRITE_BATCH_SIZE", "100")),
+    flush_interval=float(os.getenv("DB_WRITE_FLUSH_INTERVAL", "0.5"))
+)
+
 
-# -------------------
-# DB 저장 함수
-# -------------------
 def save_report(analysis_result):
     try:
-        url = analysis_result["original_url"]
-        label = analysis_result.get("label", "의심")
-
-        conn = get_db_connection()
-        c = conn.cursor(dictionary=True)
-
-        c.execute("SELECT id, count FROM reports WHERE original_url=%s", (url,))
-        row = c.fetchone()
-
-        if row:
-            new_count = row["count"] + 1
-            c.execute('''
-                UPDATE reports SET count=%s, final_url=%s, domain=%s, ssl_valid=%s,
-                whois_creation_date=%s, virustotal_score=%s, phishtank_result=%s,
-                label=%s, analysis_json=%s WHERE id=%s
-            ''', (
-                new_count,
-                analysis_result.get("final_url"),
-                analysis_result.get("domain"),
-                analysis_result.get("ssl_valid"),
-                analysis_result.get("whois_creation_date"),
-                analysis_result.get("virustotal_score"),
-                analysis_result.get("phishtank_result"),
-                label,
-                json.dumps(analysis_result, ensure_ascii=False),
-                row["id"]
-            ))
-        else:
-            c.execute('''
-                INSERT INTO reports (
-                    original_url, final_url, domain, ssl_valid, whois_creation_date,
-                    virustotal_score, phishtank_result, label, analysis_json
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ''', (
-                url,
-                analysis_result.get("final_url"),
-                analysis_result.get("domain"),
-                analysis_result.get("ssl_valid"),
-                analysis_result.get("whois_creation_date"),
-                analysis_result.get("virustotal_score"),
-                analysis_result.get("phishtank_result"),
-                label,
-                json.dumps(analysis_result, ensure_ascii=False)
-            ))
-
-        if label == "의심":
-            print("🟡 [DB] suspected 테이블에 저장", flush=True)
-            c.execute('''
-                INSERT IGNORE INTO suspected (
-                    original_url, final_url, domain, ssl_valid,
-                    whois_creation_date, virustotal_score,
-                    phishtank_result, label, analysis_json
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ''', (
-                url,
-                analysis_result.get("final_url"),
-                analysis_result.get("domain"),
-                analysis_result.get("ssl_valid"),
-                analysis_result.get("whois_creation_date"),
-                analysis_result.get("virustotal_score"),
-                analysis_result.get("phishtank_result"),
-                label,
-                json.dumps(analysis_result, ensure_ascii=False)
-            ))
-
-        elif label == "위험":
-            print("🔴 [DB] warning 테이블에 바로 저장", flush=True)
-            c.execute('''
-                INSERT IGNORE INTO warning (
-                    original_url, final_url, domain, ssl_valid,
-                    whois_creation_date, virustotal_score,
-                    phishtank_result, label, analysis_json
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ''', (
-                url,
-                analysis_result.get("final_url"),
-                analysis_result.get("domain"),
-                analysis_result.get("ssl_valid"),
-                analysis_result.get("whois_creation_date"),
-                analysis_result.get("virustotal_score"),
-                analysis_result.get("phishtank_result"),
-                label,
-                json.dumps(analysis_result, ensure_ascii=False)
-            ))
-
-        conn.commit()
-        conn.close()
+        # 큐가 가득 차면 응답이 늦어지더라도 바로 저장 (유실 방지)
+        if DB_WRITE_BEHIND and report_queue.put(analysis_result):
+            return
+        write_reports([analysis_result])
 
     except Exception as e:
-        print("❌ save_report() 오류:", e, flush=True)
-        traceback.print_exc()
+        metrics.count_error("save_report")
+        log.exception(f"❌ save_report() 오류: {e}")
 
 # -------------------
 # 신고 API
 # -------------------
+REPORT_WARNING_THRESHOLD = int(os.getenv("REPORT_WARNING_THRESHOLD", "3"))
+
+
 @app.route('/report_qr', methods=['POST'])
 def report_qr():
     try:
@@ -202,37 +103,44 @@ def report_qr():
         url = data.get("url")
         if not url:
             return jsonify({"error": "URL 필요"}), 400
+        url = verdict_cache.canonicalize_url(url)
 
-        conn = get_db_connection()
-        c = conn.cursor(dictionary=True)
-        c.execute("SELECT id, reported_count FROM suspected WHERE original_url=%s", (url,))
-        row = c.fetchone()
-
-        if not row:
-            conn.close()
+        row = get_storage().report_url(url, REPORT_WARNING_THRESHOLD)
+        if row is None:
+            # 의심 상태가 아님 (검사 기록이 없거나 이미 warning으로 승격됨)
             return jsonify({"error": "이미 신고 처리된 QR 입니다."}), 400
 
-        reported_count = row["reported_count"] + 1
-
-        if reported_count >= 3:
-            print("🚨 신고 누적 3회 이상 → warning 이동", flush=True)
-            c.execute("INSERT IGNORE INTO warning SELECT * FROM suspected WHERE id=%s", (row["id"],))
-            c.execute("DELETE FROM suspected WHERE id=%s", (row["id"],))
-        else:
-            c.execute("UPDATE suspected SET reported_count=%s WHERE id=%s", (reported_count, row["id"]))
-
-        conn.commit()
-        conn.close()
-        return jsonify({"status": "신고 완료", "current_count": reported_count}), 200
+        if row["state"] == "warning":
+            log.info(f"🚨 신고 누적 {REPORT_WARNING_THRESHOLD}회 이상 → warning 승격", extra={"url": url})
+        return jsonify({"status": "신고 완료", "current_count": row["reported_count"]}), 200
 
     except Exception as e:
-        print("❌ report_qr() 오류:", e, flush=True)
-        traceback.print_exc()
+        metrics.count_error("report_qr")
+        log.exception(f"❌ report_qr() 오류: {e}")
         return jsonify({"error": str(e)}), 500
 
 # -------------------
 # QR 디코드 + URL 분석
 # -------------------
+def _is_truthy(value):
+    return str(value).lower() in ("1", "true", "yes")
+
+
+def _result_payload(qr_text, analysis_result, cache_source):
+    return {
+        "original_url": qr_text,
+        "final_url": analysis_result.get("final_url"),
+        "domain": analysis_result.get("domain"),
+        "ssl_valid": analysis_result.get("ssl_valid"),
+        "redirect_chain": analysis_result.get("redirect_chain", []),
+        "whois_creation_date": analysis_result.get("whois_creation_date"),
+        "virustotal_score": analysis_result.get("virustotal_score"),
+        "label": analysis_result.get("label", "의심"),
+        "partial": analysis_result.get("partial", False),
+        "virustotal_pending": analysis_result.get("virustotal_pending", False),
+        "cached": cache_source != "miss"
+    }
+
 @app.route('/decode_qr', methods=['POST', 'OPTIONS'])
 def decode_qr_route():
     if request.method == "OPTIONS":
@@ -243,11 +151,7 @@ def decode_qr_route():
             file = request.files['file']
             if file.filename == '':
                 return jsonify({"error": "파일 없음"}), 400
-            filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-
-            qr_text = decode_qr(filepath)
+            qr_text = decode_qr(file.read())
             if not qr_text:
                 return jsonify({"error": "QR 코드 디코딩 실패"}), 400
         else:
@@ -256,60 +160,434 @@ def decode_qr_route():
                 return jsonify({"error": "URL 데이터 없음"}), 400
             qr_text = data["url"]
 
-        print(f"[서버 수신] QR 내용: {qr_text}", flush=True)
-        analysis_result = analyze_url(qr_text)
-        analysis_result["original_url"] = qr_text
+        # ?refresh=1 또는 폼/JSON의 refresh 값으로 캐시 무시
+        refresh = _is_truthy(request.args.get("refresh") or request.form.get("refresh"))
+        if not refresh and request.is_json:
+            refresh = _is_truthy((request.get_json(silent=True) or {}).get("refresh"))
+
+        log.debug("[서버 수신] QR 내용: %s", qr_text)
+        analysis_result, cache_source = verdict_cache.get_or_analyze(qr_text, analyze_url, refresh=refresh)
 
         save_report(analysis_result)
 
-        print(f"[분석 결과] {analysis_result}", flush=True)
+        return jsonify(_result_payload(qr_text, analysis_result, cache_source)), 200
+
+    except Exception as e:
+        metrics.count_error("decode_qr_route")
+        log.exception(f"❌ decode_qr_route() 오류: {e}")
+        return jsonify({"error": str(e)}), 500
+
+# -------------------
+# 여러 이미지 / URL 일괄 디코드 + 분석
+# -------------------
+QR_BATCH_MAX_ITEMS = int(os.getenv("QR_BATCH_MAX_ITEMS", "50"))
+# 일괄 요청에서 동시에 진행할 URL 분석 수
+BATCH_ANALYZE_CONCURRENCY = int(os.getenv("BATCH_ANALYZE_CONCURRENCY", "4"))
+_batch_executor = ThreadPoolExecutor(max_workers=BATCH_ANALYZE_CONCURRENCY, thread_name_prefix="batch")
+
+
+def _analyze_and_save(qr_text, refresh):
+    analysis_result, cache_source = verdict_cache.get_or_analyze(qr_text, analyze_url, refresh=refresh)
+    save_report(analysis_result)
+    return _result_payload(qr_text, analysis_result, cache_source)
+
+
+@app.route('/decode_qr_batch', methods=['POST', 'OPTIONS'])
+def decode_qr_batch_route():
+    """
+    입력 형식
+    - multipart: files (이미지 여러 개), urls (필드 반복) -> 이미지 먼저, URL은 그 뒤 순서
+    - JSON: {"urls": [...]}
+    응답의 results는 입력 순서를 유지하며, 실패한 항목에는 error가 담김
+    """
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+
+    try:
+        items = []
+        for file in request.files.getlist('files') + request.files.getlist('file'):
+            items.append({"type": "image", "filename": file.filename, "data": file.read()})
+        if request.is_json:
+            data = request.get_json(silent=True) or {}
+            urls = data.get("urls") or []
+            refresh = _is_truthy(data.get("refresh") or request.args.get("refresh"))
+        else:
+            urls = request.form.getlist("urls")
+            refresh = _is_truthy(request.args.get("refresh") or request.form.get("refresh"))
+        items += [{"type": "url", "url": url} for url in urls]
+
+        if not items:
+            return jsonify({"error": "이미지 또는 URL 없음"}), 400
+        if len(items) > QR_BATCH_MAX_ITEMS:
+            return jsonify({"error": f"한 번에 최대 {QR_BATCH_MAX_ITEMS}개까지 요청할 수 있습니다."}), 400
+
+        # 1️⃣ 모든 이미지를 프로세스 풀에서 동시에 디코드
+        decode_futures = {
+            i: submit_decode_all(item["data"])
+            for i, item in enumerate(items) if item["type"] == "image"
+        }
+
+        results = []
+        for i, item in enumerate(items):
+            entry = {"index": i, "type": item["type"]}
+            if item["type"] == "image":
+                entry["filename"] = item["filename"]
+                try:
+                    texts = decode_futures[i].result()
+                    if not texts:
+                        entry["error"] = "QR 코드 디코딩 실패"
+                    entry["codes"] = [{"text": text} for text in texts]
+                except Exception as e:
+                    entry["error"] = f"이미지 처리 실패: {e}"
+                    entry["codes"] = []
+            else:
+                if not isinstance(item["url"], str) or not item["url"].strip():
+                    entry["error"] = "URL 데이터 없음"
+                entry["url"] = item["url"]
+            results.append(entry)
+
+        # 2️⃣ 찾은 URL을 정규화 URL 기준으로 중복 없이 제한된 동시성으로 분석
+        #    (끝 슬래시·대소문자·추적 파라미터만 다른 URL은 한 번만 분석하고 저장)
+        analysis_futures = {}
+        for entry in results:
+            if "error" in entry and entry["type"] == "url":
+                continue
+            for text in ([c["text"] for c in entry["codes"]] if entry["type"] == "image" else [entry["url"]]):
+                key = verdict_cache.canonicalize_url(text)
+                if key not in analysis_futures:
+                    analysis_futures[key] = _batch_executor.submit(_analyze_and_save, text, refresh)
+
+        def analysis_for(text):
+            try:
+                return dict(analysis_futures[verdict_cache.canonicalize_url(text)].result(), original_url=text)
+            except Exception as e:
+                return {"original_url": text, "error": str(e)}
+
+        for entry in results:
+            if entry["type"] == "image":
+                for code in entry["codes"]:
+                    code["analysis"] = analysis_for(code["text"])
+            elif "error" not in entry:
+                entry["analysis"] = analysis_for(entry["url"])
+
+        return jsonify({"count": len(results), "results": results}), 200
+
+    except Exception as e:
+        metrics.count_error("decode_qr_batch_route")
+        log.exception(f"❌ decode_qr_batch_route() 오류: {e}")
+        return jsonify({"error": str(e)}), 500
+
+# -------------------
+# 비동기 스캔 작업 (제출 즉시 job_id 반환 -> 폴링 또는 SSE로 결과 수신)
+# -------------------
+JOB_STREAM_TIMEOUT = float(os.getenv("JOB_STREAM_TIMEOUT", "60"))
+# 열린 SSE 스트림은 연결이 끝날 때까지 요청 스레드를 하나씩 점유하므로 동시 스트림 수를 제한
+# (기본값: 요청 스레드의 절반, 나머지 스레드는 다른 API용으로 남김)
+JOB_STREAM_MAX = int(os.getenv("JOB_STREAM_MAX", str(max(1, int(os.getenv("GUNICORN_THREADS", "8")) // 2))))
+_stream_lock = threading.Lock()
+_open_streams = 0
+
+
+def _run_scan_job(job):
+    payload = job.payload
+    if "image" in payload:
+        qr_text = decode_qr(payload["image"])
+        job.emit("decode", {"text": qr_text})
+        if not qr_text:
+            raise ValueError("QR 코드 디코딩 실패")
+    else:
+        qr_text = payload["url"]
+
+    analysis_result, cache_source = verdict_cache.get_or_analyze(
+        qr_text, lambda url: analyze_url(url, progress=job.emit), refresh=payload["refresh"]
+    )
+    if cache_source != "miss":
+        job.emit("cache", {"source": cache_source})
+    save_report(analysis_result)
+    job.emit("saved")
+    return _result_payload(qr_text, analysis_result, cache_source)
+
+
+job_manager = JobManager(
+    _run_scan_job,
+    workers=int(os.getenv("JOB_WORKERS", "4")),
+    max_pending=int(os.getenv("JOB_QUEUE_SIZE", "100")),
+    result_ttl=int(os.getenv("JOB_RESULT_TTL", "600"))
+)
+
+
+@app.route('/jobs', methods=['POST', 'OPTIONS'])
+def submit_job():
+    if request.method == "OPTIONS":
+        return jsonify({"status": "ok"}), 200
+
+    try:
+        if 'file' in request.files:
+            image = request.files['file'].read()
+            if not image:
+                return jsonify({"error": "파일 없음"}), 400
+            refresh = _is_truthy(request.args.get("refresh") or request.form.get("refresh"))
+            key = "image:" + hashlib.sha256(image).hexdigest()
+            payload = {"image": image, "refresh": refresh}
+        else:
+            data = request.get_json(silent=True)
+            if not data or not data.get("url"):
+                return jsonify({"error": "URL 데이터 없음"}), 400
+            refresh = _is_truthy(data.get("refresh") or request.args.get("refresh"))
+            key = "url:" + verdict_cache.canonicalize_url(data["url"])
+            payload = {"url": data["url"], "refresh": refresh}
+
+        try:
+            job, created = job_manager.submit(key, payload)
+        except JobQueueFull:
+            response = jsonify({"error": "대기 중인 검사가 너무 많습니다. 잠시 후 다시 시도하세요."})
+            response.headers["Retry-After"] = "5"
+            return response, 503
 
-        return jsonify({
-            "original_url": qr_text,
-            "final_url": analysis_result.get("final_url"),
-            "domain": analysis_result.get("domain"),
-            "ssl_valid": analysis_result.get("ssl_valid"),
-            "whois_creation_date": analysis_result.get("whois_creation_date"),
-            "virustotal_score": analysis_result.get("virustotal_score"),
-            "label": analysis_result.get("label", "의심")
-        }), 200
+        response = jsonify({"job_id": job.id, "status": job.status, "deduplicated": not created})
+        response.headers["Location"] = f"/jobs/{job.id}"
+        return response, 202
 
     except Exception as e:
-        print("❌ decode_qr_route() 오류:", e, flush=True)
-        traceback.print_exc()
+        metrics.count_error("submit_job")
+        log.exception(f"❌ submit_job() 오류: {e}")
         return jsonify({"error": str(e)}), 500
 
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+    return jsonify(job.to_dict()), 200
+
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_job(job_id):
+    """
+    Server-Sent Events로 단계별 진행 상황 전송 (Last-Event-ID로 이어받기 가능)
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+
+    try:
+        last_seq = int(request.headers.get("Last-Event-ID", "-1"))
+    except ValueError:
+        last_seq = -1
+
+    global _open_streams
+    with _stream_lock:
+        full = _open_streams >= JOB_STREAM_MAX
+        if not full:
+            _open_streams += 1
+    if full:
+        # 클라이언트는 잠시 후 다시 연결하거나 GET /jobs/<job_id>로 폴링
+        response = jsonify({"error": "열린 진행 상황 스트림이 너무 많습니다. 잠시 후 다시 시도하세요."})
+        response.headers["Retry-After"] = "5"
+        return response, 503
+
+    def close_stream():
+        global _open_streams
+        with _stream_lock:
+            _open_streams -= 1
+
+    def generate(seq):
+        deadline = time.monotonic() + JOB_STREAM_TIMEOUT
+        while time.monotonic() < deadline:
+            events = job.wait_events(seq, timeout=min(15.0, max(0.0, deadline - time.monotonic())))
+            for event in events:
+                seq = event["seq"]
+                data = json.dumps({"stage": event["stage"], "data": event["data"]}, ensure_ascii=False, default=str)
+                yield f"id: {seq}\nevent: {event['stage']}\ndata: {data}\n\n"
+            if job.finished and seq == len(job.events) - 1:
+                return
+            if not events:
+                yield ": keep-alive\n\n"
+
+    response = Response(stream_with_context(generate(last_seq)), mimetype="text/event-stream")
+    response.call_on_close(close_stream)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
 # -------------------
-# WARNING 테이블 조회 (대시보드)
+# WARNING 조회 (대시보드)
 # -------------------
+WARNING_PAGE_SIZE = int(os.getenv("WARNING_PAGE_SIZE", "50"))
+WARNING_PAGE_MAX = 500
+
+
+def _encode_cursor(row):
+    # 신고로 승격된 행은 id가 오래된 값이므로 warning이 된 시각(warned_at) + id 순으로 페이지 구분
+    return f"{row['warned_at'].strftime('%Y%m%d%H%M%S%f')}_{row['id']}"
+
+
+def _decode_cursor(value):
+    if value is None:
+        return None
+    warned_at, _, row_id = value.partition("_")
+    return datetime.strptime(warned_at, "%Y%m%d%H%M%S%f"), int(row_id)
+
+
 @app.route('/get_warning', methods=['GET'])
 def get_warning():
+    """
+    쿼리 파라미터
+    - limit: 페이지 크기 (기본 50, 최대 500)
+    - cursor: 이전 응답의 next_cursor (더 먼저 warning이 된 행, 최신순)
+    - since: 이전 응답의 latest_cursor (그 이후에 warning이 된 행만, 오래된 순)
+    - domain, label: 필터
+    내용이 바뀌지 않은 페이지는 If-None-Match로 요청하면 304 반환
+    """
     try:
-        conn = get_db_connection()
-        c = conn.cursor(dictionary=True)
-        c.execute("SELECT original_url, final_url, domain, ssl_valid, whois_creation_date, virustotal_score, phishtank_result, label FROM warning")
-        rows = c.fetchall()
-        conn.close()
-        return jsonify(rows), 200
+        try:
+            limit = min(max(int(request.args.get("limit", WARNING_PAGE_SIZE)), 1), WARNING_PAGE_MAX)
+            cursor = _decode_cursor(request.args.get("cursor"))
+            since = _decode_cursor(request.args.get("since"))
+        except ValueError:
+            return jsonify({"error": "잘못된 페이지 파라미터"}), 400
+
+        # 다음 페이지 존재 여부 확인을 위해 한 행 더 조회
+        rows = get_storage().list_warnings(
+            limit + 1, cursor=cursor, since=since,
+            domain=request.args.get("domain"), label=request.args.get("label")
+        )
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        cursors = [_encode_cursor(row) for row in rows]
+        for row in rows:
+            for column in ("created_at", "warned_at"):
+                if row.get(column) is not None:
+                    row[column] = row[column].strftime("%Y-%m-%d %H:%M:%S")
+
+        if since is not None:
+            # since 모드는 오래된 순이므로 마지막 행이 가장 최근
+            latest_cursor = cursors[-1] if cursors else request.args.get("since")
+        else:
+            latest_cursor = cursors[0] if cursors and cursor is None else None
+        response = jsonify({
+            "items": rows,
+            # 두 모드 모두 마지막 행 다음부터 이어서 조회
+            "next_cursor": cursors[-1] if has_more else None,
+            # 다음 방문 때 since로 넘길 값 (가장 최근에 warning이 된 행)
+            "latest_cursor": latest_cursor,
+            "has_more": has_more
+        })
+        response.headers["Cache-Control"] = "no-cache"
+        response.add_etag()
+        return response.make_conditional(request)
     except Exception as e:
-        print("❌ get_warning() 오류:", e, flush=True)
-        traceback.print_exc()
+        metrics.count_error("get_warning")
+        log.exception(f"❌ get_warning() 오류: {e}")
         return jsonify({"error": str(e)}), 500
 
 # -------------------
-# CORS 헤더 보강
+# 캐시 / 쓰기 큐 통계
+# -------------------
+@app.route('/stats', methods=['GET'])
+def stats():
+    return jsonify({
+        "verdict_cache": verdict_cache.stats(),
+        "decode_cache": decode_cache_stats(),
+        "whois_cache": whois_cache.stats(),
+        "virustotal": virustotal.stats(),
+        "db_pool": get_storage().pool_stats(),
+        "write_behind": dict(report_queue.stats(), enabled=DB_WRITE_BEHIND),
+        "jobs": dict(job_manager.stats(), open_streams=_open_streams, max_streams=JOB_STREAM_MAX)
+    }), 200
+
 # -------------------
+# Prometheus 지표 (/metrics)
+# -------------------
+def _cache_stats():
+    return {
+        "verdict": verdict_cache.stats(),
+        "decode": decode_cache_stats(),
+        "whois": whois_cache.stats(),
+        "virustotal": virustotal.stats()
+    }
+
+
+def _cache_lookups():
+    caches = _cache_stats()
+    verdict, decode, whois_stats, vt = caches["verdict"], caches["decode"], caches["whois"], caches["virustotal"]
+    return {
+        ("verdict", "hit"): verdict["memory_hits"] + verdict["db_hits"],
+        ("verdict", "miss"): verdict["misses"],
+        ("decode", "hit"): decode["hits"],
+        ("decode", "miss"): decode["misses"],
+        ("whois", "hit"): whois_stats["memory_hits"] + whois_stats["db_hits"],
+        ("whois", "miss"): whois_stats["queries"],
+        ("virustotal", "hit"): vt["hits"],
+        ("virustotal", "miss"): vt["misses"]
+    }
+
+
+def _cache_hit_ratio():
+    ratios = {}
+    for (cache, result), value in _cache_lookups().items():
+        hits, total = ratios.get((cache,), (0, 0))
+        ratios[(cache,)] = (hits + (value if result == "hit" else 0), total + value)
+    return {key: round(hits / total, 4) if total else 0.0 for key, (hits, total) in ratios.items()}
+
+
+metrics.register_gauge(
+    "qr_cache_lookups_total", "Cache lookups by result", _cache_lookups, ["cache", "result"], kind="counter"
+)
+metrics.register_gauge("qr_cache_hit_ratio", "Cache hit ratio since start", _cache_hit_ratio, ["cache"])
+metrics.register_gauge(
+    "qr_cache_entries", "Entries held in memory caches",
+    lambda: {(name,): data["size"] if "size" in data else data.get("cached") for name, data in _cache_stats().items()},
+    ["cache"]
+)
+metrics.register_gauge(
+    "qr_db_pool_connections", "DB connection pool usage",
+    lambda: {(state,): value for state, value in get_storage().pool_stats().items()}, ["state"]
+)
+metrics.register_gauge("qr_write_behind_depth", "Results waiting in the write-behind queue", report_queue.depth)
+metrics.register_gauge(
+    "qr_jobs_pending", "Scan jobs queued or running", lambda: job_manager.stats()["pending"]
+)
+metrics.register_gauge(
+    "qr_virustotal_calls_total", "VirusTotal API outcomes",
+    lambda: {(k,): virustotal.stats()[k] for k in ("requests", "pending", "rate_limited", "errors")},
+    ["outcome"], kind="counter"
+)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_route():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+# -------------------
+# 요청별 단계 시간 (Server-Timing) + CORS 헤더 보강
+# -------------------
+@app.before_request
+def before_request():
+    request.environ["qr.started"] = metrics.start_request()
+
+
 @app.after_request
 def after_request(response):
+    started = request.environ.get("qr.started")
+    if started is not None:
+        timings, total = metrics.finish_request(started)
+        response.headers["Server-Timing"] = metrics.server_timing(timings, total)
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.REQUEST_SECONDS.observe(total, route=route, method=request.method, status=response.status_code)
     response.headers.add("Access-Control-Allow-Origin", "*")
     response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization")
     response.headers.add("Access-Control-Allow-Methods", "GET,POST,OPTIONS")
+    # 다른 출처의 프론트엔드에서도 브라우저 개발자 도구로 Server-Timing 확인 가능
+    response.headers.add("Timing-Allow-Origin", "*")
     return response
 
 # -------------------
 # 서버 실행
 # -------------------
 if __name__ == '__main__':
-    print("🚀 Flask starting (MySQL) ...", flush=True)
+    log.info("🚀 Flask starting (MySQL) ...")
     port = int(os.environ.get("PORT", 8080))
     app.run(host="0.0.0.0", port=port)
@@ -0,0 +1,77 @@
+"""
+벤치마크 입력 데이터
+- decode: uploads/ 의 원본 QR 이미지 (디코딩 마이크로 벤치마크용)
+- scan: 원본 이미지의 URL을 로컬 대상 서버로 향하도록 바꾼 뒤 다시 만든 QR 이미지
+  (qrcode 패키지가 없으면 같은 URL을 JSON으로 전송)
+"""
+import io
+import os
+import glob
+from urllib.parse import urlsplit
+
+try:
+    import qrcode
+except ImportError:
+    qrcode = None
+
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads")
+
+# 대상 서버 경로 규칙 (bench/stubs.py 의 TargetProxyServer 참고)
+URL_VARIANTS = ["", "redirect/2/", "redirect/5/", "slow/300/"]
+
+
+def load_upload_images(upload_dir=UPLOAD_DIR):
+    images = []
+    for path in sorted(glob.glob(os.path.join(upload_dir, "*"))):
+        if not os.path.isfile(path) or path.endswith(".txt"):
+            continue
+        with open(path, "rb") as f:
+            images.append((os.path.basename(path), f.read()))
+    return images
+
+
+def _to_stub_url(url, variant, index):
+    """
+    실제 URL을 같은 호스트 / 경로의 http URL로 바꿈 (HTTP_PROXY로 대상 서버가 받도록)
+    """
+    parts = urlsplit(url if "://" in url else "http://" + url)
+    host = parts.hostname or f"qrbench-{index}.com"
+    path = parts.path.lstrip("/")
+    return f"http://{host}/{variant}{path}"
+
+
+def _qr_png(text):
+    buf = io.BytesIO()
+    qrcode.make(text).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def build_corpus(decode_fn, size=40, unique=False, upload_dir=UPLOAD_DIR):
+    """
+    :param decode_fn: 이미지 바이트 -> QR 텍스트 리스트 (qr_decoder.decode_qr_all)
+    :param size: scan 항목 수 (원본 URL x 경로 규칙을 반복해서 채움)
+    :param unique: True면 항목마다 다른 쿼리를 붙여 캐시가 맞지 않는 콜드 경로를 측정
+    """
+    originals = load_upload_images(upload_dir)
+    payloads = []
+    for name, data in originals:
+        try:
+            payloads.extend(decode_fn(data))
+        except Exception:
+            continue
+    # 디코딩 가능한 원본이 없으면 (libzbar 없음 등) 가상 호스트 사용
+    if not payloads:
+        payloads = [f"http://qrbench-{i}.com/" for i in range(8)]
+    payloads = list(dict.fromkeys(payloads))
+
+    scan = []
+    for i in range(size):
+        url = _to_stub_url(payloads[i % len(payloads)], URL_VARIANTS[i % len(URL_VARIANTS)], i)
+        if unique:
+            url += ("&" if "?" in url else "?") + f"bench={i}"
+        item = {"url": url}
+        if qrcode is not None:
+            item["image"] = _qr_png(url)
+        scan.append(item)
+
+    return {"decode": originals, "scan": scan}
@@ -0,0 +1,193 @@
+"""
+벤치마크용 로컬 대역 서버
+- FakeWhoisServer: WHOIS(TCP) 응답기 -> whois_cache의 WHOIS_SERVER로 연결
+- TargetProxyServer: HTTP 프록시 겸 대상 사이트 (지연 시간 / 리다이렉트 체인 설정 가능)
+- FakeVirusTotalServer: VirusTotal v3 /urls/{id} 응답기 -> VIRUSTOTAL_API_URL로 연결
+"""
+import json
+import time
+import random
+import threading
+import socketserver
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+
+def _sleep_ms(ms, jitter=0.2):
+    if ms > 0:
+        time.sleep(ms * random.uniform(1 - jitter, 1 + jitter) / 1000.0)
+
+
+class _Server:
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"{host}:{port}"
+
+
+# -------------------
+# WHOIS
+# -------------------
+class FakeWhoisServer(_Server):
+    def __init__(self, latency_ms=150, host="127.0.0.1", port=0):
+        outer = self
+        self.latency_ms = latency_ms
+        self.requests = 0
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                domain = self.rfile.readline().decode("idna").strip()
+                outer.requests += 1
+                _sleep_ms(outer.latency_ms)
+                # 도메인마다 고정된 생성 연도 (2010 ~ 2024) -> 안전 / 의심 판정이 섞이도록
+                year = 2010 + sum(domain.encode()) % 15
+                self.wfile.write((
+                    f"Domain Name: {domain.upper()}\r\n"
+                    f"Registrar: QR Bench Registrar\r\n"
+                    f"Creation Date: {year}-03-01T10:00:00Z\r\n"
+                ).encode())
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+
+# -------------------
+# 대상 사이트 (HTTP 프록시)
+# -------------------
+class TargetProxyServer(_Server):
+    """
+    HTTP_PROXY로 지정하면 어떤 호스트로 가는 요청이든 이 서버가 받음
+    경로 규칙
+    - /redirect/<n>/...  : n번 302 리다이렉트 후 200
+    - /slow/<ms>/...     : ms 만큼 추가 지연 후 200
+    - 그 외               : 기본 지연(latency_ms) 후 200
+    """
+
+    def __init__(self, latency_ms=50, body_bytes=16 * 1024, host="127.0.0.1", port=0):
+        outer = self
+        self.latency_ms = latency_ms
+        self.body = b"<html>" + b"x" * max(0, body_bytes - 13) + b"</html>"
+        self.requests = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self.do_GET()
+
+            def do_GET(self):
+                outer.requests += 1
+                # 프록시 요청은 절대 URL, 직접 요청은 경로만 들어옴
+                parts = urlsplit(self.path)
+                host = parts.netloc or self.headers.get("Host", "")
+                segments = [s for s in parts.path.split("/") if s]
+                _sleep_ms(outer.latency_ms)
+
+                if len(segments) >= 2 and segments[0] == "redirect" and segments[1].isdigit():
+                    remaining = int(segments[1])
+                    if remaining > 0:
+                        rest = "/".join(segments[2:])
+                        location = f"{parts.scheme or 'http'}://{host}/redirect/{remaining - 1}/{rest}"
+                        self.send_response(302)
+                        self.send_header("Location", location)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                elif len(segments) >= 2 and segments[0] == "slow" and segments[1].isdigit():
+                    _sleep_ms(int(segments[1]), jitter=0)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+                self.send_header("Content-Length", str(len(outer.body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(outer.body)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+
+# -------------------
+# VirusTotal v3
+# -------------------
+class FakeVirusTotalServer(_Server):
+    def __init__(self, latency_ms=200, not_found_ratio=0.1, host="127.0.0.1", port=0):
+        outer = self
+        self.latency_ms = latency_ms
+        self.not_found_ratio = not_found_ratio
+        self.requests = 0
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                outer.requests += 1
+                _sleep_ms(outer.latency_ms)
+                segments = [s for s in urlsplit(self.path).path.split("/") if s]
+                if len(segments) < 2 or segments[-2] != "urls":
+                    self._send(404, {"error": {"code": "NotFoundError"}})
+                    return
+                url_id = segments[-1]
+                seed = sum(url_id.encode())
+                if (seed % 100) < outer.not_found_ratio * 100:
+                    self._send(404, {"error": {"code": "NotFoundError"}})
+                    return
+                self._send(200, {"data": {"id": url_id, "type": "url", "attributes": {
+                    "last_analysis_stats": {
+                        "malicious": seed % 3, "suspicious": seed % 2,
+                        "harmless": 60 + seed % 10, "undetected": 20
+                    }
+                }}})
+
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+
+
+def start_all(whois_latency_ms=150, target_latency_ms=50, vt_latency_ms=200):
+    return {
+        "whois": FakeWhoisServer(latency_ms=whois_latency_ms).start(),
+        "target": TargetProxyServer(latency_ms=target_latency_ms).start(),
+        "virustotal": FakeVirusTotalServer(latency_ms=vt_latency_ms).start(),
+    }
+
+
+def stub_env(stubs):
+    """
+    앱 / 분석 모듈이 대역 서버를 바라보도록 하는 환경 변수
+    """
+    return {
+        "WHOIS_SERVER": stubs["whois"].address,
+        "HTTP_PROXY": f"http://{stubs['target'].address}",
+        "http_proxy": f"http://{stubs['target'].address}",
+        "NO_PROXY": "127.0.0.1,localhost",
+        "no_proxy": "127.0.0.1,localhost",
+        "VIRUSTOTAL_API_URL": f"http://{stubs['virustotal'].address}/api/v3",
+        "VIRUSTOTAL_API_KEY": "bench",
+        # 벤치마크에서는 VirusTotal 한도에 걸리지 않도록 충분히 크게
+        "VT_RATE_PER_MIN": "1000000",
+        "VT_BURST": "100000",
+    }
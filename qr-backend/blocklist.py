@@ -0,0 +1,305 @@
+"""
+피싱 피드(PhishTank / URLhaus / OpenPhish) 덤프 파일로 만드는 로컬 차단 목록 인덱스
+
+인덱스 파일 구조 (모든 정수는 big-endian)
+- 헤더: MAGIC, 항목 수, Bloom 비트 수, Bloom 해시 개수, 버킷 비트 수
+- Bloom 필터 비트 배열
+- 버킷 시작 위치 배열 (해시 상위 비트 -> 정렬 배열의 시작 인덱스)
+- 정렬된 8바이트 해시 배열 (정규화 URL "u:" / 호스트 "h:")
+
+파일은 mmap으로 열기 때문에 여러 gunicorn 워커가 같은 페이지 캐시를 공유함
+갱신은 임시 파일에 쓴 뒤 os.replace로 교체하고, 읽는 쪽은 주기적으로 파일 변경을 확인해 다시 연결함
+
+사용법
+    python blocklist.py build            # feeds/ 에서 바뀐 피드만 읽어 기존 인덱스에 추가
+    python blocklist.py build --full     # 모든 피드로 처음부터 다시 생성
+    python blocklist.py check <url>
+"""
+import os
+import csv
+import sys
+import json
+import mmap
+import time
+import struct
+import hashlib
+import threading
+from urllib.parse import urlsplit
+from dotenv import load_dotenv
+from url_utils import canonicalize_url
+from logger import get_logger
+
+load_dotenv()
+
+log = get_logger("blocklist")
+
+BLOCKLIST_PATH = os.getenv("BLOCKLIST_PATH", "blocklist.idx")
+BLOCKLIST_FEED_DIR = os.getenv("BLOCKLIST_FEED_DIR", "feeds")
+# 읽는 쪽이 인덱스 파일 교체 여부를 확인하는 주기(초)
+BLOCKLIST_RELOAD_INTERVAL = float(os.getenv("BLOCKLIST_RELOAD_INTERVAL", "30"))
+
+MAGIC = b"QRBLIDX1"
+HEADER = struct.Struct(">8sQQII")
+BUCKET_BITS = 16
+BLOOM_BITS_PER_ENTRY = 10
+BLOOM_HASHES = 7
+
+
+# -------------------
+# 해시
+# -------------------
+def _hash(kind, value):
+    digest = hashlib.blake2b(f"{kind}:{value}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _keys_for(url):
+    """
+    URL 하나에 대해 조회할 해시 목록 (정규화 URL, 호스트)
+    """
+    canonical = canonicalize_url(url)
+    host = urlsplit(canonical).hostname or ""
+    return _hash("u", canonical), _hash("h", host)
+
+
+def _entries_for(url):
+    """
+    피드 항목 하나를 인덱스 해시로 변환
+    경로가 없는 항목(사이트 전체가 등록된 경우)만 호스트 단위로 차단
+    """
+    canonical = canonicalize_url(url)
+    parts = urlsplit(canonical)
+    entries = [_hash("u", canonical)]
+    if parts.path == "/" and not parts.query and parts.hostname:
+        entries.append(_hash("h", parts.hostname))
+    return entries
+
+
+def _bloom_positions(h, bits, k=BLOOM_HASHES):
+    # 64비트 해시를 둘로 나눠 double hashing
+    h1, h2 = h >> 32, (h & 0xFFFFFFFF) | 1
+    return [(h1 + i * h2) % bits for i in range(k)]
+
+
+# -------------------
+# 피드 파일 읽기
+# -------------------
+def _looks_like_url(value):
+    value = value.strip().lower()
+    return value.startswith("http://") or value.startswith("https://")
+
+
+def iter_feed_urls(path):
+    """
+    피드 덤프에서 URL 추출
+    - .json: PhishTank JSON (객체 배열의 "url")
+    - .csv: PhishTank / URLhaus CSV ("#" 주석 줄은 건너뛰고 URL처럼 보이는 첫 칸 사용)
+    - 그 외: OpenPhish 등 한 줄에 URL 하나
+    """
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            for item in json.load(f):
+                url = item.get("url") if isinstance(item, dict) else item
+                if isinstance(url, str) and _looks_like_url(url):
+                    yield url.strip()
+    elif path.endswith(".csv"):
+        with open(path, encoding="utf-8", errors="replace", newline="") as f:
+            lines = (line for line in f if not line.startswith("#"))
+            for row in csv.reader(lines):
+                for value in row:
+                    if _looks_like_url(value):
+                        yield value.strip()
+                        break
+    else:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#") and _looks_like_url(line):
+                    yield line
+
+
+# -------------------
+# 인덱스 생성
+# -------------------
+def _write_index(hashes, out_path):
+    hashes = sorted(hashes)
+    count = len(hashes)
+    bloom_bits = max(1024, count * BLOOM_BITS_PER_ENTRY)
+    bloom = bytearray((bloom_bits + 7) // 8)
+    buckets = [0] * ((1 << BUCKET_BITS) + 1)
+    for h in hashes:
+        for pos in _bloom_positions(h, bloom_bits):
+            bloom[pos >> 3] |= 1 << (pos & 7)
+        buckets[(h >> (64 - BUCKET_BITS)) + 1] += 1
+    for i in range(1, len(buckets)):
+        buckets[i] += buckets[i - 1]
+
+    tmp_path = f"{out_path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, count, bloom_bits, BLOOM_HASHES, BUCKET_BITS))
+        f.write(bloom)
+        f.write(struct.pack(f">{len(buckets)}I", *buckets))
+        f.write(struct.pack(f">{count}Q", *hashes))
+        f.flush()
+        os.fsync(f.fileno())
+    # 읽는 쪽은 항상 완성된 파일만 보도록 원자적으로 교체
+    os.replace(tmp_path, out_path)
+    return count
+
+
+def build_index(feed_paths=None, out_path=None, full=False):
+    """
+    피드 파일로 인덱스 생성
+    full=False면 지난번 이후 바뀐 피드만 읽어 기존 인덱스 항목에 추가 (삭제 반영은 full=True)
+    :return: (인덱스 항목 수, 새로 읽은 피드 수)
+    """
+    out_path = out_path or BLOCKLIST_PATH
+    state_path = out_path + ".feeds.json"
+    if feed_paths is None:
+        feed_paths = sorted(
+            os.path.join(BLOCKLIST_FEED_DIR, name) for name in os.listdir(BLOCKLIST_FEED_DIR)
+            if not name.startswith(".")
+        ) if os.path.isdir(BLOCKLIST_FEED_DIR) else []
+
+    state = {}
+    hashes = set()
+    if not full and os.path.exists(out_path):
+        reader = BlocklistIndex(out_path)
+        hashes.update(reader.iter_hashes())
+        reader.close()
+        if os.path.exists(state_path):
+            with open(state_path, encoding="utf-8") as f:
+                state = json.load(f)
+
+    changed = 0
+    for path in feed_paths:
+        mtime = os.path.getmtime(path)
+        if not full and state.get(path) == mtime:
+            continue
+        for url in iter_feed_urls(path):
+            try:
+                hashes.update(_entries_for(url))
+            except ValueError:
+                continue
+        state[path] = mtime
+        changed += 1
+
+    count = _write_index(hashes, out_path)
+    with open(state_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(state_path + ".tmp", state_path)
+    return count, changed
+
+
+# -------------------
+# 인덱스 조회
+# -------------------
+class BlocklistIndex:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        stat = os.fstat(self._file.fileno())
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.count, self.bloom_bits, self.bloom_hashes, self.bucket_bits = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"차단 목록 인덱스 형식이 아닙니다: {path}")
+        self._bloom_offset = HEADER.size
+        self._bucket_offset = self._bloom_offset + (self.bloom_bits + 7) // 8
+        self._hash_offset = self._bucket_offset + ((1 << self.bucket_bits) + 1) * 4
+
+    def _hash_at(self, i):
+        return struct.unpack_from(">Q", self._map, self._hash_offset + i * 8)[0]
+
+    def _bloom_contains(self, h):
+        for pos in _bloom_positions(h, self.bloom_bits, self.bloom_hashes):
+            if not self._map[self._bloom_offset + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def contains_hash(self, h):
+        if not self.count or not self._bloom_contains(h):
+            return False
+        # 해시 상위 비트로 버킷을 찾고, 버킷 안에서만 이진 탐색 (평균 몇 개 항목)
+        bucket = h >> (64 - self.bucket_bits)
+        lo, hi = struct.unpack_from(">II", self._map, self._bucket_offset + bucket * 4)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self._hash_at(mid)
+            if value == h:
+                return True
+            if value < h:
+                lo = mid + 1
+            else:
+                hi = mid
+        return False
+
+    def iter_hashes(self):
+        for i in range(self.count):
+            yield self._hash_at(i)
+
+    def close(self):
+        try:
+            self._map.close()
+        finally:
+            self._file.close()
+
+
+_index = None
+_checked_at = None
+_lock = threading.Lock()
+
+
+def _current_index():
+    """
+    현재 인덱스 반환 (파일이 교체되었으면 다시 mmap)
+    """
+    global _index, _checked_at
+    now = time.monotonic()
+    if _checked_at is not None and now - _checked_at < BLOCKLIST_RELOAD_INTERVAL:
+        return _index
+    with _lock:
+        if _checked_at is not None and now - _checked_at < BLOCKLIST_RELOAD_INTERVAL:
+            return _index
+        _checked_at = now
+        try:
+            stat = os.stat(BLOCKLIST_PATH)
+        except OSError:
+            _index = None
+            return None
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if _index is None or _index.identity != identity:
+            try:
+                # 이전 매핑은 닫지 않고 GC에 맡김 (다른 스레드가 조회 중일 수 있음)
+                _index = BlocklistIndex(BLOCKLIST_PATH)
+                log.info(f"🛡️ 차단 목록 인덱스 로드: {_index.count}개 항목")
+            except (OSError, ValueError, struct.error) as e:
+                log.error(f"❌ 차단 목록 인덱스 로드 실패: {e}")
+        return _index
+
+
+def contains(url):
+    """
+    URL 또는 그 호스트가 차단 목록에 있는지 확인 (인덱스가 없으면 False)
+    """
+    index = _current_index()
+    if index is None:
+        return False
+    try:
+        return any(index.contains_hash(h) for h in _keys_for(url))
+    except ValueError:
+        return False
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "build":
+        args = [a for a in sys.argv[2:] if a != "--full"]
+        count, changed = build_index(args or None, full="--full" in sys.argv)
+        print(f"✅ 차단 목록 인덱스 생성 완료: {count}개 항목 (새로 읽은 피드 {changed}개) -> {BLOCKLIST_PATH}")
+    elif len(sys.argv) == 3 and sys.argv[1] == "check":
+        print("위험 (차단 목록)" if contains(sys.argv[2]) else "목록에 없음")
+    else:
+        print(__doc__)
+        sys.exit(1)
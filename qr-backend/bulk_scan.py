@@ -0,0 +1,377 @@
+"""
+URL / QR 이미지 대량 검사 (메일 게이트웨이에서 추출한 목록 등)
+
+입력은 한 줄씩 읽어 처리하므로 입력 크기와 관계없이 메모리 사용량이 일정함
+- JSONL: 한 줄에 {"url": ...} 또는 {"image": 이미지 경로} (문자열 한 줄이면 URL)
+- CSV: url / image 열 (둘 다 없으면 첫 번째 열을 URL로 사용)
+- 디렉터리: 하위의 이미지 파일 전체 (이름순)
+동시에 진행하는 항목은 --window개까지이며, 서비스별 동시 호출 수는
+--whois-concurrency / --fetch-concurrency / --vt-concurrency로 따로 제한
+
+결과는 끝나는 순서대로 출력 JSONL에 한 줄씩 기록 (입력 순서는 index로 확인)
+분석 결과는 --db-batch개씩 모아 urls 테이블에 저장 (--no-save면 저장하지 않음)
+
+체크포인트(<출력>.ckpt)에는 여기까지 모두 끝난 입력 위치(watermark)와 그 뒤에서 먼저 끝난 위치,
+그 시점의 출력 파일 크기를 기록. --resume으로 다시 실행하면 출력 파일을 그 크기로 되돌린 뒤
+끝나지 않은 항목만 검사하므로 중단된 실행을 이어도 결과가 빠지거나 두 번 기록되지 않음
+
+사용법 (qr-backend 디렉터리에서)
+    python bulk_scan.py urls.jsonl -o results.jsonl
+    python bulk_scan.py mail_images/ -o results.jsonl --window 64 --whois-concurrency 8
+    python bulk_scan.py urls.csv -o results.jsonl --resume     # 중단된 실행 이어서
+"""
+import os
+import sys
+import csv
+import json
+import time
+import signal
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp", ".tif", ".tiff")
+
+
+# -------------------
+# 입력 (한 항목씩 생성)
+# -------------------
+def _item_from_value(value):
+    if isinstance(value, str):
+        return {"type": "url", "url": value}
+    if isinstance(value, dict):
+        if value.get("image"):
+            return {"type": "image", "path": value["image"]}
+        if value.get("url"):
+            return {"type": "url", "url": value["url"]}
+    return {"type": "invalid", "value": value}
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield _item_from_value(json.loads(line))
+            except ValueError:
+                # JSON이 아닌 줄은 URL 한 줄로 취급
+                yield _item_from_value(line)
+
+
+def _read_csv(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [h.strip().lower() for h in header]
+        if "url" not in columns and "image" not in columns:
+            # 헤더가 없는 파일: 첫 줄도 데이터
+            columns = None
+            if header and header[0].strip():
+                yield _item_from_value(header[0].strip())
+        for row in reader:
+            if columns is None:
+                if row and row[0].strip():
+                    yield _item_from_value(row[0].strip())
+                continue
+            record = {k: v.strip() for k, v in zip(columns, row) if v and v.strip()}
+            if record:
+                yield _item_from_value(record)
+
+
+def _read_directory(path):
+    for root, dirs, files in os.walk(path):
+        # 다시 실행해도 같은 순서가 되도록 정렬 (체크포인트의 위치가 같은 항목을 가리켜야 함)
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield {"type": "image", "path": os.path.join(root, name)}
+
+
+def read_items(path):
+    if os.path.isdir(path):
+        return _read_directory(path)
+    if path.lower().endswith(".csv"):
+        return _read_csv(path)
+    return _read_jsonl(path)
+
+
+# -------------------
+# 체크포인트
+# -------------------
+class Checkpoint:
+    """
+    watermark 앞의 항목은 모두 끝났고, done은 watermark 뒤에서 먼저 끝난 위치
+    (동시에 진행하는 항목이 window개 이하이므로 done도 window개 이하로 유지됨)
+    """
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self.watermark = 0
+        self.done = set()
+        self.output_size = 0
+
+    @classmethod
+    def load(cls, path, source):
+        checkpoint = cls(path, source)
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("source") != os.path.abspath(source):
+            raise SystemExit(f"❌ 체크포인트의 입력({data.get('source')})과 다른 입력입니다: {source}")
+        checkpoint.watermark = data["watermark"]
+        checkpoint.done = set(data["done"])
+        checkpoint.output_size = data["output_size"]
+        return checkpoint
+
+    def is_done(self, index):
+        return index < self.watermark or index in self.done
+
+    def mark(self, index):
+        self.done.add(index)
+        while self.watermark in self.done:
+            self.done.discard(self.watermark)
+            self.watermark += 1
+
+    def save(self, output_size):
+        self.output_size = output_size
+        data = {
+            "source": os.path.abspath(self.source),
+            "watermark": self.watermark,
+            "done": sorted(self.done),
+            "output_size": output_size,
+            "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+        # 쓰는 도중 중단돼도 이전 체크포인트가 남도록 임시 파일에 쓴 뒤 교체
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+# -------------------
+# 항목별 검사 (작업 스레드)
+# -------------------
+def _analyze(text, refresh):
+    import verdict_cache
+    from analyze_url import analyze_url
+    analysis_result, cache_source = verdict_cache.get_or_analyze(text, analyze_url, refresh=refresh)
+    return {"text": text, "cache": cache_source, "analysis": analysis_result}
+
+
+def scan_item(index, item, refresh):
+    """
+    -> (출력 레코드, 저장할 분석 결과 목록). 예외를 밖으로 던지지 않음 (실패는 레코드의 error)
+    """
+    from qr_decoder import submit_decode_all
+    record = {"index": index, "type": item["type"]}
+    analyses = []
+    try:
+        if item["type"] == "url":
+            record["url"] = item["url"]
+            if not isinstance(item["url"], str) or not item["url"].strip():
+                record["error"] = "URL 데이터 없음"
+                return record, analyses
+            scanned = _analyze(item["url"].strip(), refresh)
+            record["cache"], record["analysis"] = scanned["cache"], scanned["analysis"]
+            analyses.append(scanned["analysis"])
+        elif item["type"] == "image":
+            record["path"] = item["path"]
+            with open(item["path"], "rb") as f:
+                data = f.read()
+            # 디코딩은 프로세스 풀에서 (CPU 작업이 분석 스레드를 막지 않도록)
+            texts = submit_decode_all(data).result()
+            # 분석하는 동안 이미지 바이트를 들고 있지 않도록 바로 해제
+            del data
+            if not texts:
+                record["error"] = "QR 코드 디코딩 실패"
+            record["codes"] = []
+            for text in dict.fromkeys(texts):
+                scanned = _analyze(text, refresh)
+                record["codes"].append(scanned)
+                analyses.append(scanned["analysis"])
+        else:
+            record["value"] = item.get("value")
+            record["error"] = "지원하지 않는 입력 형식"
+    except Exception as e:
+        record["error"] = str(e)
+    return record, analyses
+
+
+# -------------------
+# 실행
+# -------------------
+def _apply_service_limits(args):
+    # 분석 모듈은 import 시점에 환경 변수를 읽으므로 import 전에 적용
+    limits = {
+        "WHOIS_CONCURRENCY": args.whois_concurrency,
+        "REDIRECT_CONCURRENCY": args.fetch_concurrency,
+        "VT_CONCURRENCY": args.vt_concurrency,
+    }
+    for name, value in limits.items():
+        if value is not None:
+            os.environ[name] = str(value)
+    # 항목마다 WHOIS / 대상 접속 / VirusTotal 세 검사가 동시에 돌므로 검사용 스레드도 그만큼 확보
+    os.environ.setdefault("ANALYZE_MAX_WORKERS", str(args.window * 3))
+
+
+# SIGINT / SIGTERM은 표시만 하고, 실행 루프가 항목 사이에서 확인해 멈춤
+# (결과 기록과 체크포인트 표시 사이에서 끊기면 --resume 때 같은 항목이 두 번 기록됨)
+_stop = threading.Event()
+
+
+def _interrupt(signum, frame):
+    _stop.set()
+
+
+def run(args):
+    _apply_service_limits(args)
+    from logger import get_logger
+    from storage import get_storage, url_row
+
+    log = get_logger("bulk_scan")
+    checkpoint_path = args.checkpoint or args.output + ".ckpt"
+
+    if args.resume and os.path.exists(checkpoint_path):
+        checkpoint = Checkpoint.load(checkpoint_path, args.input)
+        if not os.path.exists(args.output) or os.path.getsize(args.output) < checkpoint.output_size:
+            raise SystemExit(f"❌ 출력 파일이 체크포인트보다 짧습니다: {args.output}")
+        # 마지막 체크포인트 이후에 기록된 결과는 버리고 해당 항목을 다시 검사
+        with open(args.output, "ab") as out:
+            out.truncate(checkpoint.output_size)
+        log.info(f"🔁 이어서 검사: {checkpoint.watermark}번째 항목부터 (먼저 끝난 항목 {len(checkpoint.done)}개 제외)")
+    else:
+        if os.path.exists(args.output) and os.path.getsize(args.output):
+            hint = f"체크포인트({checkpoint_path})가 없습니다" if args.resume else "이어서 하려면 --resume"
+            raise SystemExit(f"❌ 출력 파일이 이미 있습니다: {args.output} ({hint})")
+        checkpoint = Checkpoint(checkpoint_path, args.input)
+        open(args.output, "wb").close()
+
+    storage = None if args.no_save else get_storage()
+    pending_rows = []
+    counts = {"done": 0, "errors": 0, "skipped": 0}
+    started = time.monotonic()
+    last_checkpoint = last_progress = started
+    since_checkpoint = 0
+
+    out = open(args.output, "a", encoding="utf-8")
+    executor = ThreadPoolExecutor(max_workers=args.window, thread_name_prefix="bulk")
+    in_flight = {}
+
+    def flush_rows():
+        if storage is not None and pending_rows:
+            storage.upsert_results(pending_rows)
+            pending_rows.clear()
+
+    def save_checkpoint():
+        nonlocal last_checkpoint, since_checkpoint
+        # 체크포인트가 가리키는 결과는 DB / 출력 파일에 모두 기록된 상태여야 함
+        flush_rows()
+        out.flush()
+        os.fsync(out.fileno())
+        checkpoint.save(out.tell())
+        last_checkpoint, since_checkpoint = time.monotonic(), 0
+
+    def collect(done_futures):
+        nonlocal last_progress, since_checkpoint
+        for future in done_futures:
+            index = in_flight.pop(future)
+            record, analyses = future.result()
+            out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            pending_rows.extend(url_row(a) for a in analyses)
+            if len(pending_rows) >= args.db_batch:
+                flush_rows()
+            checkpoint.mark(index)
+            counts["done"] += 1
+            counts["errors"] += "error" in record
+            since_checkpoint += 1
+        now = time.monotonic()
+        if since_checkpoint >= args.checkpoint_every or now - last_checkpoint >= args.checkpoint_interval:
+            save_checkpoint()
+        if now - last_progress >= 10:
+            rate = counts["done"] / (now - started)
+            log.info(f"⏳ 진행: {counts['done']}건 완료 ({rate:.1f}건/초), 대기 중인 저장 {len(pending_rows)}건")
+            last_progress = now
+
+    def collect_some():
+        # 중단 표시를 주기적으로 확인하도록 제한 시간을 두고 기다림
+        done_futures, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+        collect(done_futures)
+
+    _stop.clear()
+    previous = {sig: signal.signal(sig, _interrupt) for sig in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        for index, item in enumerate(read_items(args.input)):
+            if _stop.is_set():
+                break
+            if checkpoint.is_done(index):
+                counts["skipped"] += 1
+                continue
+            if args.limit and counts["done"] + len(in_flight) >= args.limit:
+                break
+            while len(in_flight) >= args.window and not _stop.is_set():
+                collect_some()
+            if _stop.is_set():
+                break
+            in_flight[executor.submit(scan_item, index, item, args.refresh)] = index
+        while in_flight and not _stop.is_set():
+            collect_some()
+        interrupted = _stop.is_set()
+        if interrupted:
+            # 진행 중이던 항목은 체크포인트에 들어가지 않으므로 --resume 때 다시 검사됨
+            log.warning(f"⚠️ 중단됨: 진행 중이던 {len(in_flight)}건은 다음 실행에서 다시 검사")
+            executor.shutdown(wait=False, cancel_futures=True)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        try:
+            save_checkpoint()
+        except Exception as e:
+            # 저장하지 못한 결과는 체크포인트에도 넣지 않음 (--resume 때 마지막 체크포인트부터 다시 검사)
+            log.exception(f"❌ 마지막 체크포인트 저장 실패: {e}")
+        out.close()
+    executor.shutdown(wait=not interrupted)
+
+    counts["seconds"] = round(time.monotonic() - started, 1)
+    counts["interrupted"] = interrupted
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="URL / QR 이미지 대량 검사")
+    parser.add_argument("input", help="JSONL / CSV 파일 또는 이미지 디렉터리")
+    parser.add_argument("-o", "--output", required=True, help="결과 JSONL")
+    parser.add_argument("--checkpoint", help="체크포인트 파일 (기본값: <출력>.ckpt)")
+    parser.add_argument("--resume", action="store_true", help="체크포인트부터 이어서 검사")
+    parser.add_argument("--window", type=int, default=32, help="동시에 진행하는 항목 수")
+    parser.add_argument("--whois-concurrency", type=int, help="동시 WHOIS 조회 수 (WHOIS_CONCURRENCY)")
+    parser.add_argument("--fetch-concurrency", type=int, help="동시 대상 접속 수 (REDIRECT_CONCURRENCY)")
+    parser.add_argument("--vt-concurrency", type=int, help="동시 VirusTotal 호출 수 (VT_CONCURRENCY)")
+    parser.add_argument("--db-batch", type=int, default=200, help="한 번에 저장하는 분석 결과 수")
+    parser.add_argument("--no-save", action="store_true", help="urls 테이블에 저장하지 않음")
+    parser.add_argument("--refresh", action="store_true", help="판정 캐시를 무시하고 다시 분석")
+    parser.add_argument("--checkpoint-every", type=int, default=500, help="이 개수만큼 끝날 때마다 체크포인트")
+    parser.add_argument("--checkpoint-interval", type=float, default=30, help="체크포인트 최대 간격(초)")
+    parser.add_argument("--limit", type=int, default=0, help="이번 실행에서 검사할 최대 항목 수 (0: 전체)")
+    args = parser.parse_args(argv)
+    if args.window < 1:
+        parser.error("--window는 1 이상이어야 합니다")
+    if not os.path.exists(args.input):
+        parser.error(f"입력 파일이 없습니다: {args.input}")
+
+    result = run(args)
+    status = "중단" if result["interrupted"] else "완료"
+    print(
+        f"✅ 대량 검사 {status}: {result['done']}건 ({result['errors']}건 오류, "
+        f"이전 실행에서 끝난 {result['skipped']}건 건너뜀, {result['seconds']}초)"
+    )
+    return 130 if result["interrupted"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
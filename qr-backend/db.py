@@ -0,0 +1,109 @@
+import os
+import time
+import threading
+import mysql.connector
+from mysql.connector import pooling
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+import metrics
+
+load_dotenv()
+
+# -------------------
+# MySQL 연결 설정
+# -------------------
+def _mysql_config():
+    """
+    DATABASE_URL(Railway 내부 변수)에서 접속 정보 추출 (풀을 처음 만들 때 읽음)
+    """
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        raise Exception("❌ DATABASE_URL 환경 변수가 설정되어 있지 않습니다!")
+    parsed = urlparse(db_url)
+    return {
+        "host": parsed.hostname,
+        "port": parsed.port or 3306,
+        "user": parsed.username,
+        "password": parsed.password,
+        "database": parsed.path.lstrip('/')
+    }
+
+# -------------------
+# 커넥션 풀 설정
+# -------------------
+DB_POOL_SIZE = min(int(os.getenv("DB_POOL_SIZE", "5")), pooling.CNX_POOL_MAXSIZE)
+# 풀이 모두 사용 중일 때 빈 연결을 기다리는 최대 시간(초)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+# 이 시간(초) 이상 쉬었던 연결은 꺼내기 전에 ping으로 상태 확인
+DB_POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", "30"))
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_last_checkout = {}  # id(실제 연결) -> 마지막으로 꺼낸 시각
+
+
+def _get_pool():
+    """
+    워커 프로세스마다 하나의 풀을 지연 생성 (fork 이후 연결 공유 방지)
+    """
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name=f"qr_pool_{pid}",
+                    pool_size=DB_POOL_SIZE,
+                    pool_reset_session=True,
+                    **_mysql_config()
+                )
+                _pool_pid = pid
+                _last_checkout.clear()
+    return _pool
+
+
+def get_db_connection():
+    """
+    풀에서 연결을 꺼내 반환 (conn.close() 호출 시 풀로 반납됨)
+    """
+    with metrics.stage("db_connect"):
+        return _checkout()
+
+
+def _checkout():
+    pool = _get_pool()
+    deadline = time.monotonic() + DB_POOL_TIMEOUT
+    while True:
+        try:
+            conn = pool.get_connection()
+            break
+        except pooling.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.02)
+
+    # 오래 쉬던 연결은 서버 쪽에서 끊겼을 수 있으므로 재연결까지 확인
+    now = time.monotonic()
+    key = id(conn._cnx)
+    if now - _last_checkout.get(key, now) >= DB_POOL_PING_INTERVAL:
+        try:
+            conn.ping(reconnect=True, attempts=2, delay=0)
+        except mysql.connector.Error:
+            conn.close()
+            raise
+    _last_checkout[key] = now
+    return conn
+
+
+def pool_stats():
+    """
+    현재 워커 프로세스의 풀 사용 현황 (풀을 아직 만들지 않았으면 idle=None)
+    """
+    pool = _pool if _pool_pid == os.getpid() else None
+    idle = pool._cnx_queue.qsize() if pool is not None else None
+    return {
+        "size": DB_POOL_SIZE,
+        "idle": idle,
+        "in_use": DB_POOL_SIZE - idle if idle is not None else None
+    }
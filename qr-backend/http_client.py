@@ -0,0 +1,63 @@
+import os
+import threading
+import requests
+from http.cookiejar import DefaultCookiePolicy
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# -------------------
+# 공유 HTTP 세션 설정
+# -------------------
+# 호스트별로 유지할 커넥션 풀 개수 / 풀당 최대 연결 수
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "32"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+# 연결 실패 / 일시적인 5xx 응답에 대한 재시도 횟수
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    retry = Retry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=0,
+        status=HTTP_RETRIES,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        # Retry-After 만큼 잠들지 않도록 함 (429는 virustotal 모듈이 직접 처리)
+        respect_retry_after_header=False,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry
+    )
+    session = requests.Session()
+    # 서로 다른 스캔 사이에 쿠키가 남지 않도록 쿠키 저장 비활성화
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """
+    워커 프로세스마다 하나의 requests.Session 반환
+    (keep-alive로 VirusTotal 등 같은 호스트에 대한 TCP/TLS 연결을 재사용)
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+    return _session
@@ -0,0 +1,147 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class JobQueueFull(Exception):
+    """대기 중인 작업 수가 한도에 도달해 새 작업을 받을 수 없음"""
+
+
+class Job:
+    def __init__(self, key, payload):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.payload = payload
+        self.status = "queued"   # queued -> running -> done | failed
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.events = []         # [{"seq", "stage", "data", "at"}]
+        self._cond = threading.Condition()
+        self.emit("queued")
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def emit(self, stage, data=None):
+        """
+        단계별 진행 상황 기록 (SSE 구독자에게 전달)
+        """
+        with self._cond:
+            # 작업이 끝난 뒤 늦게 도착한 검사 결과(타임아웃된 검사 등)는 무시
+            if self.finished:
+                return
+            self._append(stage, data)
+
+    def _append(self, stage, data):
+        self.events.append({"seq": len(self.events), "stage": stage, "data": data, "at": time.time()})
+        self._cond.notify_all()
+
+    def _finish(self, status, result=None, error=None):
+        # 상태 변경과 마지막 이벤트 추가를 한 번에 처리해 구독자가 완료 이벤트를 놓치지 않도록 함
+        with self._cond:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            self.payload = None
+            self._append(status, result if status == "done" else {"error": error})
+
+    def wait_events(self, after_seq, timeout):
+        """
+        after_seq 이후의 이벤트를 반환 (없으면 timeout 초까지 대기)
+        """
+        with self._cond:
+            if len(self.events) <= after_seq + 1 and not self.finished:
+                self._cond.wait(timeout)
+            return self.events[after_seq + 1:]
+
+    def to_dict(self):
+        with self._cond:
+            data = {
+                "job_id": self.id,
+                "status": self.status,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+                "stages": [e["stage"] for e in self.events],
+            }
+            if self.status == "done":
+                data["result"] = self.result
+            elif self.status == "failed":
+                data["error"] = self.error
+            return data
+
+
+class JobManager:
+    """
+    제한된 워커 풀에서 스캔 작업을 실행하는 작업 관리자
+    - 같은 key로 진행 중인 작업이 있으면 새로 만들지 않고 그 작업을 반환
+    - 대기 + 실행 중 작업 수가 max_pending에 도달하면 JobQueueFull 발생
+    - 끝난 작업은 result_ttl 초 동안만 조회 가능
+    """
+
+    def __init__(self, run_fn, workers=4, max_pending=100, result_ttl=600):
+        self.run_fn = run_fn
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs = {}       # job_id -> Job
+        self._inflight = {}   # key -> Job
+        self._stats = {"submitted": 0, "deduplicated": 0, "rejected": 0, "done": 0, "failed": 0}
+
+    def submit(self, key, payload):
+        """
+        :return: (Job, 새로 만든 작업인지 여부)
+        """
+        with self._lock:
+            self._evict_expired()
+            job = self._inflight.get(key)
+            if job is not None:
+                self._stats["deduplicated"] += 1
+                return job, False
+            if len(self._inflight) >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise JobQueueFull()
+
+            job = Job(key, payload)
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+            self._stats["submitted"] += 1
+
+        self._executor.submit(self._run, job)
+        return job, True
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job):
+        job.status = "running"
+        job.emit("running")
+        try:
+            result = self.run_fn(job)
+            job._finish("done", result=result)
+        except Exception as e:
+            job._finish("failed", error=str(e))
+        finally:
+            with self._lock:
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+                self._stats[job.status] += 1
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, pending=len(self._inflight), capacity=self.max_pending, retained=len(self._jobs))
@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# -------------------
+# 로그 설정
+# -------------------
+# DEBUG / INFO / WARNING / ERROR (운영에서는 WARNING으로 낮춰 요청별 로그 생략)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# text: 사람이 읽는 한 줄 형식 / json: 로그 수집기용 한 줄 JSON
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+# LogRecord 기본 속성 (이 외의 속성은 extra로 넘긴 구조화 필드)
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_configured = False
+_lock = threading.Lock()
+
+
+def _extra_fields(record):
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_FIELDS and not k.startswith("_")}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(name)s] %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            # 예외 스택이 붙은 경우에도 필드는 첫 줄 끝에 표시
+            first, sep, rest = line.partition("\n")
+            line = first + " " + " ".join(f"{k}={v}" for k, v in fields.items()) + sep + rest
+        return line
+
+
+def _configure():
+    global _configured
+    with _lock:
+        if _configured:
+            return
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+        root = logging.getLogger("qr")
+        root.addHandler(handler)
+        root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+        root.propagate = False
+        _configured = True
+
+
+def get_logger(name):
+    """
+    모듈별 로거 반환 (qr.<name>)
+    구조화 필드는 extra로 전달: log.info("저장 완료", extra={"table": "warning", "rows": 3})
+    """
+    _configure()
+    return logging.getLogger(f"qr.{name}")
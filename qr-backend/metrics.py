@@ -0,0 +1,208 @@
+"""
+단계별 소요 시간 / 캐시 / 풀 / 오류 지표
+
+- stage("whois") 같은 블록의 소요 시간을 히스토그램에 기록하고,
+  요청 처리 중이면 같은 값을 요청별 수집기에 더해 Server-Timing 헤더로 내보냄
+- 요청별 수집기는 contextvar에 있으므로 스레드 풀에 넘기는 작업은
+  contextvars.copy_context().run으로 감싸야 같은 요청에 합산됨
+- render()는 Prometheus 텍스트 형식 (/metrics). 지표는 워커 프로세스 단위로 집계됨
+"""
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# 단위: 초
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _format_labels(labels):
+    labels = list(labels)
+    if not labels:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(k, "") for k in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(zip(self.label_names, key))} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # 라벨 -> [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(k, "") for k in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in items:
+            labels = list(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', '+Inf')])} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """
+    스크랩할 때 fn()을 호출해 값을 읽는 게이지
+    fn은 숫자 하나 또는 {라벨 튜플: 값} 딕셔너리를 반환
+    """
+
+    def __init__(self, name, help_text, fn, label_names=(), kind="gauge"):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.label_names = tuple(label_names)
+        self.kind = kind
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        values = self.fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in sorted(values.items()):
+            if value is None:
+                continue
+            lines.append(f"{self.name}{_format_labels(zip(self.label_names, key))} {_format_value(value)}")
+        return lines
+
+
+# -------------------
+# 지표 목록
+# -------------------
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def _register(metric):
+    with _registry_lock:
+        _registry.append(metric)
+    return metric
+
+
+STAGE_SECONDS = _register(Histogram(
+    "qr_stage_duration_seconds", "Time spent in each processing stage", ["stage"]
+))
+REQUEST_SECONDS = _register(Histogram(
+    "qr_http_request_duration_seconds", "HTTP request latency", ["route", "method", "status"]
+))
+ERRORS = _register(Counter("qr_errors_total", "Handled errors", ["where"]))
+
+
+def register_gauge(name, help_text, fn, label_names=(), kind="gauge"):
+    """
+    다른 모듈의 stats()를 스크랩 시점에 읽는 지표 등록 (kind="counter"면 누적 값)
+    """
+    return _register(Gauge(name, help_text, fn, label_names, kind))
+
+
+def render():
+    lines = []
+    with _registry_lock:
+        registry = list(_registry)
+    for metric in registry:
+        try:
+            lines.extend(metric.collect())
+        except Exception:
+            # 통계 함수 하나가 실패해도 나머지 지표는 내보냄
+            ERRORS.inc(where=f"metrics:{metric.name}")
+    return "\n".join(lines) + "\n"
+
+
+# -------------------
+# 단계별 시간 측정
+# -------------------
+def observe(stage_name, seconds):
+    STAGE_SECONDS.observe(seconds, stage=stage_name)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage_name] = timings.get(stage_name, 0.0) + seconds
+
+
+@contextmanager
+def stage(stage_name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage_name, time.perf_counter() - start)
+
+
+def count_error(where):
+    ERRORS.inc(where=where)
+
+
+def start_request():
+    """
+    현재 요청의 단계 시간 수집 시작 -> 시작 시각
+    """
+    _request_timings.set({})
+    return time.perf_counter()
+
+
+def finish_request(started):
+    """
+    수집 종료 -> (단계별 초 딕셔너리, 전체 초)
+    """
+    timings = _request_timings.get() or {}
+    _request_timings.set(None)
+    return dict(timings), time.perf_counter() - started
+
+
+def server_timing(timings, total):
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
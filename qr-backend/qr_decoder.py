@@ -1,23 +1,197 @@
+import io
+import os
+import time
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pyzbar.pyzbar import decode
-from PIL import Image
+from PIL import Image, ImageOps
+import metrics
+from logger import get_logger
 
-def decode_qr(image_path):
+log = get_logger("qr_decoder")
+
+# 디코딩은 CPU 작업이므로 코어 수만큼의 프로세스 풀에서 실행
+QR_DECODE_PROCESSES = int(os.getenv("QR_DECODE_PROCESSES", "0")) or os.cpu_count() or 1
+# 휴대폰 사진처럼 큰 이미지는 긴 변을 이 크기로 줄인 뒤 디코딩
+QR_MAX_DIMENSION = int(os.getenv("QR_MAX_DIMENSION", "1600"))
+# 이미지 내용 해시 -> 디코딩 결과 캐시 크기
+QR_DECODE_CACHE_SIZE = int(os.getenv("QR_DECODE_CACHE_SIZE", "512"))
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+_cache = OrderedDict()  # sha256 -> 텍스트 리스트
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _open_image(image):
+    # 파일 경로 또는 이미지 바이트 모두 허용
+    if isinstance(image, (bytes, bytearray)):
+        return Image.open(io.BytesIO(image))
+    return Image.open(image)
+
+
+def _prepare(img):
+    """
+    디코딩 전처리: 축소 + 회전 보정 + 투명 배경 제거 + 흑백 변환
+    """
+    # JPEG는 디코딩 단계에서 바로 축소된 크기로 읽음
+    img.draft("L", (QR_MAX_DIMENSION, QR_MAX_DIMENSION))
+    img = ImageOps.exif_transpose(img)
+
+    # 투명 배경 PNG는 그대로 흑백 변환하면 배경이 검게 되므로 흰 배경에 합성
+    if img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        background = Image.new("RGBA", img.size, (255, 255, 255, 255))
+        background.alpha_composite(img)
+        img = background
+
+    if img.mode != "L":
+        img = img.convert("L")
+    if max(img.size) > QR_MAX_DIMENSION:
+        img.thumbnail((QR_MAX_DIMENSION, QR_MAX_DIMENSION), Image.BILINEAR)
+    return img
+
+
+def _decode_opencv(img):
+    """
+    pyzbar가 실패했을 때 OpenCV QRCodeDetector로 재시도
+    """
+    import numpy as np
+    import cv2
+
+    pixels = np.asarray(img)
+    detector = cv2.QRCodeDetector()
+    ok, texts, _, _ = detector.detectAndDecodeMulti(pixels)
+    texts = [t for t in texts if t] if ok else []
+    if not texts:
+        text, _, _ = detector.detectAndDecode(pixels)
+        texts = [text] if text else []
+    return texts
+
+
+def _decode_image(image):
+    img = _prepare(_open_image(image))
+    texts = []
+    for obj in decode(img):
+        text = obj.data.decode("utf-8", errors="replace")
+        if text not in texts:
+            texts.append(text)
+    if not texts:
+        texts = list(dict.fromkeys(_decode_opencv(img)))
+    return texts
+
+
+def _cache_get(key):
+    with _cache_lock:
+        texts = _cache.get(key)
+        if texts is None:
+            _cache_stats["misses"] += 1
+            return None
+        _cache.move_to_end(key)
+        _cache_stats["hits"] += 1
+        return list(texts)
+
+
+def _cache_put(key, texts):
+    with _cache_lock:
+        _cache[key] = list(texts)
+        _cache.move_to_end(key)
+        while len(_cache) > QR_DECODE_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def decode_cache_stats():
+    with _cache_lock:
+        return dict(_cache_stats, size=len(_cache))
+
+
+def decode_qr_all(image):
+    """
+    이미지 안의 모든 QR 코드 텍스트를 순서대로 반환 (중복 제거)
+    바이트로 전달된 이미지는 내용 해시로 캐시되어 같은 이미지는 다시 디코딩하지 않음
+    :param image: 이미지 파일 경로 또는 바이트
+    :return: 텍스트 리스트 (QR 코드가 없으면 빈 리스트)
+    """
+    if not isinstance(image, (bytes, bytearray)):
+        with metrics.stage("decode"):
+            return _decode_image(image)
+
+    key = hashlib.sha256(image).hexdigest()
+    texts = _cache_get(key)
+    if texts is None:
+        with metrics.stage("decode"):
+            texts = _decode_image(image)
+        _cache_put(key, texts)
+    return texts
+
+
+def decode_qr(image):
     """
     이미지에서 QR 코드를 읽어 URL이나 텍스트를 반환
-    :param image_path: QR 이미지 파일 경로
+    :param image: QR 이미지 파일 경로 또는 업로드된 이미지 바이트
     :return: QR 안의 텍스트 (URL)
     """
     try:
-        img = Image.open(image_path)
-        decoded_objects = decode(img)
-
-        if not decoded_objects:
+        texts = decode_qr_all(image)
+        if not texts:
             return None  # QR 코드 없음
 
         # 첫 번째 QR 코드 텍스트 반환
-        qr_text = decoded_objects[0].data.decode("utf-8")
-        return qr_text
+        return texts[0]
 
     except Exception as e:
-        print(f"QR 디코드 에러: {e}")
+        metrics.count_error("decode")
+        log.warning(f"QR 디코드 에러: {e}")
         return None
+
+
+def _get_pool(reset=False):
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if reset or _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if reset or _pool is None or _pool_pid != pid:
+                if reset and _pool is not None:
+                    _pool.shutdown(wait=False, cancel_futures=True)
+                # 스레드가 도는 gunicorn 워커에서 fork하지 않도록 forkserver 사용
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else None)
+                _pool = ProcessPoolExecutor(max_workers=QR_DECODE_PROCESSES, mp_context=context)
+                _pool_pid = pid
+    return _pool
+
+
+def submit_decode_all(image):
+    """
+    이미지 바이트를 프로세스 풀에서 디코딩하도록 제출하고 Future 반환
+    (캐시에 있는 이미지는 풀을 거치지 않고 완료된 Future 반환)
+    """
+    key = hashlib.sha256(image).hexdigest()
+    texts = _cache_get(key)
+    if texts is not None:
+        future = Future()
+        future.set_result(texts)
+        return future
+
+    submitted = time.perf_counter()
+    try:
+        future = _get_pool().submit(_decode_image, image)
+    except BrokenProcessPool:
+        # 자식 프로세스가 비정상 종료된 풀은 다시 만들어 한 번 더 시도
+        future = _get_pool(reset=True).submit(_decode_image, image)
+
+    def _store(done):
+        if not done.cancelled() and done.exception() is None:
+            # 풀 대기 시간을 포함한 디코딩 시간 (콜백은 풀 관리 스레드에서 실행되므로 Server-Timing에는 빠짐)
+            metrics.observe("decode", time.perf_counter() - submitted)
+            _cache_put(key, done.result())
+
+    future.add_done_callback(_store)
+    return future
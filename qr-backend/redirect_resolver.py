@@ -0,0 +1,195 @@
+import os
+import re
+import time
+import threading
+import requests
+import urllib3
+from urllib.parse import urljoin, urlsplit
+from dotenv import load_dotenv
+from http_client import get_session
+
+load_dotenv()
+
+# -------------------
+# 리다이렉트 추적 설정
+# -------------------
+REDIRECT_MAX_HOPS = int(os.getenv("REDIRECT_MAX_HOPS", "10"))
+# 한 응답에서 읽는 본문 최대 크기 (meta refresh 확인용, 나머지는 받지 않고 연결 종료)
+REDIRECT_MAX_BYTES = int(os.getenv("REDIRECT_MAX_BYTES", "16384"))
+# 같은 호스트로 동시에 여는 연결 수 (한 호스트로 몰리는 스캔이 풀을 독점하지 않도록)
+REDIRECT_PER_HOST = int(os.getenv("REDIRECT_PER_HOST", "4"))
+# 전체 동시 연결 수 (0이면 제한 없음, 대량 스캔 시 나가는 연결 수 상한)
+REDIRECT_CONCURRENCY = int(os.getenv("REDIRECT_CONCURRENCY", "0"))
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+_META_REFRESH = re.compile(
+    rb"""<meta[^>]+http-equiv\s*=\s*["']?refresh["']?[^>]*content\s*=\s*["']?\s*\d*\s*;?\s*url\s*=\s*([^"'>\s]+)""",
+    re.IGNORECASE
+)
+
+# 인증서가 잘못된 hop도 끝까지 따라가기 위해 verify=False로 다시 요청할 때의 경고 생략
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+_host_slots = {}  # host -> [세마포어, 사용 중이거나 기다리는 요청 수]
+_host_lock = threading.Lock()
+_global_slot = threading.BoundedSemaphore(REDIRECT_CONCURRENCY) if REDIRECT_CONCURRENCY > 0 else None
+
+
+def _acquire_host(host, timeout):
+    """
+    호스트별 연결 슬롯을 얻음 -> 성공 여부 (성공하면 _release_host로 반납)
+    """
+    with _host_lock:
+        entry = _host_slots.get(host)
+        if entry is None:
+            entry = _host_slots[host] = [threading.BoundedSemaphore(REDIRECT_PER_HOST), 0]
+        entry[1] += 1
+    if timeout > 0 and entry[0].acquire(timeout=timeout):
+        return True
+    _leave_host(host)
+    return False
+
+
+def _release_host(host):
+    _host_slots[host][0].release()
+    _leave_host(host)
+
+
+def _leave_host(host):
+    # 아무도 쓰지 않는 호스트의 슬롯은 지움 (대량 스캔에서 호스트 수만큼 쌓이지 않도록)
+    with _host_lock:
+        entry = _host_slots[host]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _host_slots[host]
+
+
+def _read_head(response, deadline):
+    """
+    본문을 최대 REDIRECT_MAX_BYTES까지만, 마감 시간 전까지만 읽음
+    -> (읽은 바이트, 전부 읽었는지). 전부 읽은 응답만 연결을 풀로 돌려보낼 수 있음
+    """
+    # read1은 도착한 만큼만 반환 (read는 요청한 크기가 찰 때까지 기다림, urllib3 2.3 미만은 read 사용)
+    raw = response.raw
+    read = getattr(raw, "read1", None) or raw.read
+    chunks, size = [], 0
+    while True:
+        chunk = read(4096, decode_content=True)
+        if not chunk:
+            return b"".join(chunks), True
+        chunks.append(chunk)
+        size += len(chunk)
+        # 조금씩 흘려보내는 응답은 읽기 타임아웃에 걸리지 않으므로 마감 시간도 확인
+        if size >= REDIRECT_MAX_BYTES or time.monotonic() >= deadline:
+            return b"".join(chunks)[:REDIRECT_MAX_BYTES], False
+
+
+def _request(url, deadline, verify):
+    timeout = max(0.1, deadline - time.monotonic())
+    response = get_session().get(url, timeout=timeout, allow_redirects=False, stream=True, verify=verify)
+    complete = False
+    try:
+        if response.status_code in REDIRECT_STATUSES:
+            length = response.headers.get("Content-Length")
+            # 리다이렉트 응답 본문은 보통 작으므로 모두 읽고 keep-alive 연결(TLS 세션)을 재사용
+            if length is not None and length.isdigit() and int(length) <= REDIRECT_MAX_BYTES:
+                body, complete = _read_head(response, deadline)
+            else:
+                body = b""
+        elif "html" in response.headers.get("Content-Type", "").lower():
+            body, complete = _read_head(response, deadline)
+        else:
+            body = b""
+    finally:
+        if not complete:
+            # 끝없는 스트림 / 큰 파일은 더 받지 않고 연결을 끊음
+            response.close()
+    return response, body
+
+
+def resolve(url, timeout=5.0, max_hops=None):
+    """
+    리다이렉트를 한 hop씩 따라가며 체인 반환 (본문은 hop마다 REDIRECT_MAX_BYTES까지만 읽음)
+    :param timeout: 체인 전체에 대한 제한 시간(초)
+    :return: {
+        "final_url": 마지막으로 응답한 URL (실패 시 None),
+        "ssl_valid": 오류 없이 끝난 마지막 hop이 https이고 인증서가 유효한지 (error가 있으면 항상 False),
+        "chain": [{"url", "status", "scheme", "cert_valid"}, ...]  (cert_valid는 http hop이면 None),
+        "error": 중단 사유 (정상 종료 시 없음)
+    }
+    """
+    max_hops = REDIRECT_MAX_HOPS if max_hops is None else max_hops
+    deadline = time.monotonic() + timeout
+    chain = []
+    result = {"final_url": None, "ssl_valid": False, "chain": chain}
+    seen = set()
+
+    while True:
+        if len(chain) > max_hops:
+            result["error"] = "too_many_redirects"
+            break
+        if url in seen:
+            result["error"] = "redirect_loop"
+            break
+        seen.add(url)
+
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https") or not parts.hostname:
+            result["error"] = "unsupported_url"
+            break
+
+        if _global_slot is not None and not _global_slot.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            result["error"] = "timeout"
+            break
+        host = f"{parts.hostname}:{parts.port or scheme}"
+        if not _acquire_host(host, deadline - time.monotonic()):
+            if _global_slot is not None:
+                _global_slot.release()
+            result["error"] = "timeout"
+            break
+
+        hop = {"url": url, "status": None, "scheme": scheme, "cert_valid": None}
+        chain.append(hop)
+        try:
+            try:
+                response, body = _request(url, deadline, verify=True)
+                if scheme == "https":
+                    hop["cert_valid"] = True
+            except requests.exceptions.SSLError:
+                # 인증서 오류를 기록한 뒤 검증 없이 다시 요청해 체인은 계속 추적
+                hop["cert_valid"] = False
+                response, body = _request(url, deadline, verify=False)
+        except requests.exceptions.Timeout:
+            result["error"] = "timeout"
+            break
+        except requests.exceptions.RequestException as e:
+            result["error"] = type(e).__name__
+            break
+        finally:
+            _release_host(host)
+            if _global_slot is not None:
+                _global_slot.release()
+
+        hop["status"] = response.status_code
+        result["final_url"] = url
+
+        location = response.headers.get("Location") if response.status_code in REDIRECT_STATUSES else None
+        if not location and response.status_code == 200:
+            match = _META_REFRESH.search(body)
+            if match:
+                location = match.group(1).decode("utf-8", errors="replace")
+                hop["meta_refresh"] = True
+        if not location:
+            break
+        url = urljoin(url, location.strip())
+
+    # 체인이 리다이렉트가 아닌 응답으로 끝난 경우에만 마지막 hop의 인증서로 판단
+    # (중간 hop이 https였더라도 접속 실패 / 루프 / 지원하지 않는 스킴으로 끝나면 유효하지 않음)
+    if "error" not in result:
+        last = chain[-1]
+        result["ssl_valid"] = (
+            last["scheme"] == "https" and last["cert_valid"] is True
+            and last["status"] not in REDIRECT_STATUSES
+        )
+    return result
@@ -0,0 +1,72 @@
+"""
+urls.analysis_json 보존 기간 정리
+
+판정 캐시(verdict_cache)와 대시보드는 최근 행의 요약 컬럼만 쓰므로,
+오래 갱신되지 않은 행의 큰 analysis_json은 urls_archive로 압축해 옮기고 원본 칸은 비움
+-> urls 테이블의 자주 읽는 페이지가 버퍼 풀에 머무름
+작은 배치마다 따로 커밋하므로 서비스 중에 실행해도 잠금이 길게 잡히지 않음
+
+보관된 내용 확인
+- MySQL: SELECT UNCOMPRESS(analysis_json_z) FROM urls_archive WHERE original_url=...
+- SQLite: zlib.decompress(analysis_json_z)
+
+사용법
+    python retention.py              # RETENTION_DAYS일 동안 갱신되지 않은 행을 보관 후 비움
+    python retention.py --drop       # 보관하지 않고 비움
+    python retention.py --dry-run    # 대상 행 수만 출력
+cron 예시: 0 4 * * * cd /app/qr-backend && python retention.py
+"""
+import os
+import sys
+import time
+from dotenv import load_dotenv
+from storage import get_storage
+from logger import get_logger
+
+load_dotenv()
+
+log = get_logger("retention")
+
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "30"))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+# 배치 사이 쉬는 시간(초) (복제 지연 / 온라인 트래픽 영향 완화)
+RETENTION_PAUSE = float(os.getenv("RETENTION_PAUSE", "0.05"))
+
+def compact(days=None, archive=True, batch_size=None, dry_run=False):
+    """
+    days일 동안 갱신되지 않은 행의 analysis_json 정리
+    :return: {"rows": 정리한 (dry_run이면 대상) 행 수, "batches": 배치 수}
+    """
+    days = RETENTION_DAYS if days is None else days
+    batch_size = batch_size or RETENTION_BATCH_SIZE
+    storage = get_storage()
+    cutoff = storage.retention_cutoff(days)
+    last = None
+    total, batches = 0, 0
+
+    while True:
+        rows = storage.retention_candidates(cutoff, last, batch_size)
+        if not rows:
+            break
+        last = rows[-1]
+        ids = [row[0] for row in rows]
+        batches += 1
+        if dry_run:
+            total += len(ids)
+            continue
+        total += storage.compact_rows(ids, cutoff, archive)
+        if RETENTION_PAUSE:
+            time.sleep(RETENTION_PAUSE)
+
+    return {"rows": total, "batches": batches}
+
+
+if __name__ == "__main__":
+    unknown = [a for a in sys.argv[1:] if a not in ("--drop", "--dry-run")]
+    if unknown:
+        print(__doc__)
+        sys.exit(1)
+    dry_run = "--dry-run" in sys.argv
+    result = compact(archive="--drop" not in sys.argv, dry_run=dry_run)
+    action = "정리 대상" if dry_run else "정리 완료"
+    print(f"✅ analysis_json {action}: {result['rows']}행 ({result['batches']}배치, 기준 {RETENTION_DAYS}일)")
@@ -0,0 +1,774 @@
+"""
+저장소 계층 (urls / urls_archive / whois_cache 테이블)
+
+DATABASE_URL 스킴으로 구현 선택
+- mysql://user:pw@host:3306/db      -> MySQLStorage (db.py 커넥션 풀)
+- sqlite:///reports.db              -> SQLiteStorage (현재 디렉터리 기준 상대 경로)
+- sqlite:////data/reports.db        -> SQLiteStorage (절대 경로)
+- 미설정                            -> sqlite:///reports.db (저장소에 포함된 파일, 단일 서버 / 로컬 실행용)
+
+스키마 생성 / 기존 테이블 이전은 import 시점이 아니라 첫 조회 / 저장 때 프로세스마다 한 번만 실행
+-> 워커가 DB 왕복 없이 바로 뜨고, DB가 잠시 내려가 있어도 다음 요청에서 다시 시도
+동시에 시작한 워커끼리는 MySQL GET_LOCK / SQLite BEGIN IMMEDIATE로 직렬화
+"""
+import os
+import json
+import zlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+from db import get_db_connection, pool_stats as mysql_pool_stats
+from url_utils import canonicalize_url
+from logger import get_logger
+import metrics
+
+load_dotenv()
+
+log = get_logger("storage")
+
+DEFAULT_DATABASE_URL = "sqlite:///reports.db"
+# 다른 프로세스가 쓰기 잠금을 잡고 있을 때 기다리는 최대 시간(밀리초)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+LABEL_STATES = {"의심": "suspected", "위험": "warning"}
+LEGACY_TABLES = ("reports", "suspected", "warning")
+LEGACY_COLUMNS = '''original_url, final_url, domain, ssl_valid, whois_creation_date, virustotal_score,
+    phishtank_result, label, count, reported_count, analysis_json, created_at'''
+LEGACY_COLUMN_NAMES = [name.strip() for name in LEGACY_COLUMNS.split(",")]
+WARNING_COLUMNS = "id, original_url, final_url, domain, ssl_valid, whois_creation_date, virustotal_score, phishtank_result, label, created_at, warned_at"
+
+
+def url_row(analysis_result):
+    """
+    분석 결과 -> urls upsert 파라미터 (original_url, ..., analysis_json, state)
+    """
+    # 같은 목적지의 URL이 여러 행으로 나뉘지 않도록 정규화된 URL을 키로 저장
+    url = analysis_result.get("canonical_url") or analysis_result["original_url"]
+    label = analysis_result.get("label", "의심")
+    return (
+        url,
+        analysis_result.get("final_url"),
+        analysis_result.get("domain"),
+        analysis_result.get("ssl_valid"),
+        analysis_result.get("whois_creation_date"),
+        analysis_result.get("virustotal_score"),
+        analysis_result.get("phishtank_result"),
+        label,
+        json.dumps(analysis_result, ensure_ascii=False),
+        LABEL_STATES.get(label, "scanned")
+    )
+
+
+def _merge_legacy_rows(rows):
+    """
+    예전 테이블의 행(LEGACY_COLUMNS 순서)을 정규화 URL 기준으로 합침
+    (새 저장 / 신고 조회가 모두 정규화 URL을 쓰므로 이전할 때도 같은 키로 맞춤)
+    - count / reported_count: 합계
+    - created_at: 가장 이른 값, 나머지 컬럼: 가장 최근 행의 값
+    """
+    url_i, count_i, reported_i, created_i = (
+        LEGACY_COLUMN_NAMES.index(name) for name in ("original_url", "count", "reported_count", "created_at")
+    )
+    merged = {}
+    for row in rows:
+        row = list(row)
+        row[url_i] = canonicalize_url(row[url_i])
+        prev = merged.get(row[url_i])
+        if prev is None:
+            merged[row[url_i]] = row
+            continue
+        created = [r[created_i] for r in (prev, row) if r[created_i] is not None]
+        row_is_newer = prev[created_i] is None or (row[created_i] is not None and row[created_i] >= prev[created_i])
+        newer, older = (row, prev) if row_is_newer else (prev, row)
+        newer[count_i] = (newer[count_i] or 0) + (older[count_i] or 0)
+        newer[reported_i] = (newer[reported_i] or 0) + (older[reported_i] or 0)
+        newer[created_i] = min(created) if created else None
+        merged[row[url_i]] = newer
+    return [tuple(row) for row in merged.values()]
+
+
+class Storage:
+    """
+    공통 인터페이스. 모든 공개 메서드는 먼저 ensure_schema()를 호출
+    """
+    name = None
+    param = "%s"
+
+    def __init__(self):
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def ensure_schema(self):
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            log.info(f"🔧 {self.name} DB 초기화 시작")
+            try:
+                self._create_schema()
+            except Exception:
+                metrics.count_error("init_db")
+                raise
+            self._schema_ready = True
+            log.info(f"✅ {self.name} 테이블 준비 완료")
+
+    def _warning_query(self, limit, cursor, since, domain, label):
+        """
+        /get_warning 조회문 (cursor / since는 (warned_at, id) 튜플)
+        """
+        p = self.param
+        where, params = ["state='warning'"], []
+        if domain:
+            where.append(f"domain={p}")
+            params.append(domain)
+        if label:
+            where.append(f"label={p}")
+            params.append(label)
+        if since is not None:
+            where.append(f"(warned_at > {p} OR (warned_at = {p} AND id > {p}))")
+            params += [self._ts_param(since[0]), self._ts_param(since[0]), since[1]]
+            order = "warned_at ASC, id ASC"
+        else:
+            if cursor is not None:
+                where.append(f"(warned_at < {p} OR (warned_at = {p} AND id < {p}))")
+                params += [self._ts_param(cursor[0]), self._ts_param(cursor[0]), cursor[1]]
+            order = "warned_at DESC, id DESC"
+        # 다음 페이지 존재 여부 확인을 위해 호출하는 쪽에서 limit + 1을 넘김
+        sql = f"SELECT {WARNING_COLUMNS} FROM urls WHERE {' AND '.join(where)} ORDER BY {order} LIMIT {p}"
+        params.append(limit)
+        return sql, params
+
+    def _ts_param(self, value):
+        return value
+
+    def _candidates_query(self, after):
+        p = self.param
+        sql = f"SELECT id, updated_at FROM urls WHERE updated_at < {p} AND analysis_json IS NOT NULL"
+        if after is not None:
+            sql += f" AND (updated_at > {p} OR (updated_at = {p} AND id > {p}))"
+        return sql + f" ORDER BY updated_at, id LIMIT {p}"
+
+
+# -------------------
+# MySQL
+# -------------------
+class MySQLStorage(Storage):
+    name = "MySQL"
+
+    # 한 번의 왕복으로 삽입 또는 count 증가 (동시 스캔 시 count 경쟁 없음)
+    # state는 올라가기만 함 (scanned -> suspected -> warning). 신고로 승격된 행은 다시 스캔돼도 유지
+    # MySQL은 SET 절을 왼쪽부터 평가하므로 warned_at은 바뀐 state를 보고 결정됨
+    UPSERT_SQL = '''
+        INSERT INTO urls (
+            original_url, final_url, domain, ssl_valid, whois_creation_date,
+            virustotal_score, phishtank_result, label, analysis_json, state, warned_at
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, IF(%s='warning', CURRENT_TIMESTAMP(6), NULL))
+        ON DUPLICATE KEY UPDATE count=count+1, final_url=VALUES(final_url),
+        domain=VALUES(domain), ssl_valid=VALUES(ssl_valid),
+        whois_creation_date=VALUES(whois_creation_date),
+        virustotal_score=VALUES(virustotal_score),
+        phishtank_result=VALUES(phishtank_result),
+        label=VALUES(label), analysis_json=VALUES(analysis_json),
+        state=CASE
+            WHEN state='warning' OR VALUES(state)='warning' THEN 'warning'
+            WHEN state='suspected' OR VALUES(state)='suspected' THEN 'suspected'
+            ELSE 'scanned' END,
+        warned_at=IF(state='warning', COALESCE(warned_at, CURRENT_TIMESTAMP(6)), warned_at)
+    '''
+
+    # 신고 횟수 증가와 승격을 한 문장으로 처리 (동시 신고에도 누락 / 중복 승격 없음)
+    # SET 절을 왼쪽부터 평가하므로 state / warned_at은 증가된 reported_count를 봄
+    PROMOTE_SQL = '''
+        UPDATE urls SET
+            reported_count=reported_count+1,
+            state=IF(reported_count >= %s, 'warning', state),
+            warned_at=IF(state='warning', CURRENT_TIMESTAMP(6), warned_at)
+        WHERE original_url=%s AND state='suspected'
+    '''
+
+    WHOIS_PUT_SQL = '''
+        INSERT INTO whois_cache (domain, creation_date, status, expires_at)
+        VALUES (%s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE creation_date=VALUES(creation_date),
+        status=VALUES(status), expires_at=VALUES(expires_at)
+    '''
+
+    @contextmanager
+    def _cursor(self, **kwargs):
+        conn = get_db_connection()
+        try:
+            yield conn, conn.cursor(**kwargs)
+        finally:
+            conn.close()
+
+    # -------------------
+    # 스키마
+    # -------------------
+    def _create_schema(self):
+        with self._cursor() as (conn, c):
+            # 여러 워커가 동시에 시작해도 스키마 생성 / 이전은 한 번만 진행
+            c.execute("SELECT GET_LOCK('qr_init_db', 30)")
+            c.fetchall()
+            try:
+                # 스캔 결과 / 의심 / 위험(신고 누적 포함)을 state로 구분하는 단일 테이블
+                c.execute('''
+                    CREATE TABLE IF NOT EXISTS urls (
+                        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                        original_url VARCHAR(512) NOT NULL UNIQUE,
+                        final_url VARCHAR(512),
+                        domain VARCHAR(255),
+                        ssl_valid BOOLEAN,
+                        whois_creation_date VARCHAR(128),
+                        virustotal_score VARCHAR(128),
+                        phishtank_result BOOLEAN,
+                        label VARCHAR(16),
+                        state ENUM('scanned', 'suspected', 'warning') NOT NULL DEFAULT 'scanned',
+                        count INT DEFAULT 1,
+                        reported_count INT DEFAULT 0,
+                        analysis_json MEDIUMTEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                        warned_at TIMESTAMP(6) NULL
+                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+                ''')
+                # 보존 기간이 지난 analysis_json을 압축해 옮겨두는 테이블 (retention.py)
+                c.execute('''
+                    CREATE TABLE IF NOT EXISTS urls_archive (
+                        url_id BIGINT PRIMARY KEY,
+                        original_url VARCHAR(512) NOT NULL,
+                        analysis_json_z MEDIUMBLOB,
+                        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+                ''')
+                # 등록 도메인(eTLD+1) 단위 WHOIS 캐시
+                c.execute('''
+                    CREATE TABLE IF NOT EXISTS whois_cache (
+                        domain VARCHAR(255) PRIMARY KEY,
+                        creation_date VARCHAR(128),
+                        status VARCHAR(16),
+                        expires_at BIGINT NOT NULL,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+                ''')
+                # 대시보드 조회(/get_warning, state='warning')용 인덱스
+                self._ensure_index(c, "urls", "idx_urls_state_warned", "state, warned_at, id")
+                self._ensure_index(c, "urls", "idx_urls_state_domain", "state, domain, warned_at, id")
+                self._ensure_index(c, "urls", "idx_urls_state_label", "state, label, warned_at, id")
+                # 보존 기간 정리(retention.py)용 인덱스
+                self._ensure_index(c, "urls", "idx_urls_updated", "updated_at")
+
+                self._migrate_legacy_tables(c)
+                conn.commit()
+            finally:
+                c.execute("SELECT RELEASE_LOCK('qr_init_db')")
+                c.fetchall()
+
+    @staticmethod
+    def _ensure_index(c, table, name, columns):
+        # MySQL은 CREATE INDEX IF NOT EXISTS를 지원하지 않으므로 먼저 존재 여부 확인
+        c.execute('''
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema=DATABASE() AND table_name=%s AND index_name=%s LIMIT 1
+        ''', (table, name))
+        if not c.fetchall():
+            c.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+
+    @staticmethod
+    def _table_exists(c, table):
+        c.execute('''
+            SELECT 1 FROM information_schema.tables
+            WHERE table_schema=DATABASE() AND table_name=%s LIMIT 1
+        ''', (table,))
+        return bool(c.fetchall())
+
+    def _migrate_legacy_tables(self, c):
+        """
+        예전 reports / suspected / warning 테이블을 urls 한 테이블로 옮긴 뒤 *_legacy로 이름 변경
+        (이름을 바꾸므로 다음 시작부터는 실행되지 않음, 원본 데이터는 그대로 남음)
+        """
+        legacy = [t for t in LEGACY_TABLES if self._table_exists(c, t)]
+        if not legacy:
+            return
+        log.info(f"🔧 기존 테이블 이전 시작: {', '.join(legacy)}")
+        # 원래 URL이 아니라 정규화 URL로 합쳐서 옮김 (신고 / 재검사가 같은 행을 찾도록)
+        # 여러 테이블에 같은 URL이 있으면 횟수는 큰 값을, 상태는 warning > suspected > scanned 순으로 유지
+        placeholders = ", ".join(["%s"] * len(LEGACY_COLUMN_NAMES))
+        created_i = LEGACY_COLUMN_NAMES.index("created_at")
+        if "reports" in legacy:
+            c.executemany(f'''
+                INSERT INTO urls ({LEGACY_COLUMNS}, state) VALUES ({placeholders}, 'scanned')
+                ON DUPLICATE KEY UPDATE count=GREATEST(urls.count, VALUES(count))
+            ''', self._legacy_rows(c, "reports"))
+        if "suspected" in legacy:
+            c.executemany(f'''
+                INSERT INTO urls ({LEGACY_COLUMNS}, state) VALUES ({placeholders}, 'suspected')
+                ON DUPLICATE KEY UPDATE count=GREATEST(urls.count, VALUES(count)),
+                reported_count=GREATEST(urls.reported_count, VALUES(reported_count)),
+                state=IF(urls.state='warning', urls.state, 'suspected')
+            ''', self._legacy_rows(c, "suspected"))
+        if "warning" in legacy:
+            c.executemany(f'''
+                INSERT INTO urls ({LEGACY_COLUMNS}, state, warned_at) VALUES ({placeholders}, 'warning', %s)
+                ON DUPLICATE KEY UPDATE count=GREATEST(urls.count, VALUES(count)),
+                reported_count=GREATEST(urls.reported_count, VALUES(reported_count)),
+                state='warning', warned_at=COALESCE(urls.warned_at, VALUES(warned_at))
+            ''', [row + (row[created_i],) for row in self._legacy_rows(c, "warning")])
+        c.execute("RENAME TABLE " + ", ".join(f"{t} TO {t}_legacy" for t in legacy))
+        log.info("✅ 기존 테이블 이전 완료")
+
+    @staticmethod
+    def _legacy_rows(c, table):
+        c.execute(f"SELECT {LEGACY_COLUMNS} FROM {table}")
+        return _merge_legacy_rows(c.fetchall())
+
+    # -------------------
+    # urls
+    # -------------------
+    def upsert_results(self, rows):
+        """
+        url_row() 목록을 한 번의 executemany로 저장 (커넥터가 다중 행 INSERT 한 문장으로 바꿈)
+        """
+        self.ensure_schema()
+        # warned_at 계산에 state를 한 번 더 사용
+        rows = [row + (row[-1],) for row in rows]
+        with self._cursor() as (conn, c):
+            c.executemany(self.UPSERT_SQL, rows)
+            conn.commit()
+
+    def report_url(self, url, threshold):
+        """
+        의심 상태인 URL의 신고 횟수 증가 (threshold회 이상이면 warning으로 승격)
+        :return: {"reported_count", "state"} / 의심 상태가 아니면 None
+        """
+        self.ensure_schema()
+        with self._cursor(dictionary=True) as (conn, c):
+            c.execute(self.PROMOTE_SQL, (threshold, url))
+            if c.rowcount == 0:
+                conn.rollback()
+                return None
+            c.execute("SELECT reported_count, state FROM urls WHERE original_url=%s", (url,))
+            row = c.fetchone()
+            conn.commit()
+        return row
+
+    def list_warnings(self, limit, cursor=None, since=None, domain=None, label=None):
+        self.ensure_schema()
+        sql, params = self._warning_query(limit, cursor, since, domain, label)
+        with self._cursor(dictionary=True) as (conn, c):
+            c.execute(sql, params)
+            return c.fetchall()
+
+    def get_analysis_json(self, url):
+        self.ensure_schema()
+        with self._cursor(dictionary=True) as (conn, c):
+            c.execute("SELECT analysis_json FROM urls WHERE original_url=%s", (url,))
+            row = c.fetchone()
+        return row["analysis_json"] if row else None
+
+    # -------------------
+    # whois_cache
+    # -------------------
+    def whois_get(self, domain):
+        """
+        :return: (creation_date, expires_at) / 없으면 None
+        """
+        self.ensure_schema()
+        with self._cursor(dictionary=True) as (conn, c):
+            c.execute("SELECT creation_date, expires_at FROM whois_cache WHERE domain=%s", (domain,))
+            row = c.fetchone()
+        return (row["creation_date"], row["expires_at"]) if row else None
+
+    def whois_put(self, domain, status, creation_date, expires_at):
+        self.ensure_schema()
+        with self._cursor() as (conn, c):
+            c.execute(self.WHOIS_PUT_SQL, (domain, creation_date, status, expires_at))
+            conn.commit()
+
+    # -------------------
+    # 보존 기간 정리 (retention.py)
+    # -------------------
+    def retention_cutoff(self, days):
+        self.ensure_schema()
+        with self._cursor() as (conn, c):
+            c.execute("SELECT NOW() - INTERVAL %s DAY", (days,))
+            return c.fetchone()[0]
+
+    def retention_candidates(self, cutoff, after, limit):
+        """
+        :param after: 이전 배치의 마지막 행 (id, updated_at) / 처음이면 None
+        :return: [(id, updated_at), ...] (updated_at, id 순)
+        """
+        params = [cutoff] + ([after[1], after[1], after[0]] if after else []) + [limit]
+        with self._cursor() as (conn, c):
+            c.execute(self._candidates_query(after), params)
+            return [tuple(row) for row in c.fetchall()]
+
+    def compact_rows(self, ids, cutoff, archive):
+        """
+        ids 행의 analysis_json을 비움 (archive면 urls_archive에 COMPRESS로 보관)
+        :return: 비운 행 수
+        """
+        placeholders = ", ".join(["%s"] * len(ids))
+        with self._cursor() as (conn, c):
+            if archive:
+                c.execute(f'''
+                    INSERT INTO urls_archive (url_id, original_url, analysis_json_z)
+                    SELECT id, original_url, COMPRESS(analysis_json) FROM urls
+                    WHERE id IN ({placeholders}) AND analysis_json IS NOT NULL
+                    ON DUPLICATE KEY UPDATE analysis_json_z=VALUES(analysis_json_z), archived_at=CURRENT_TIMESTAMP
+                ''', ids)
+            # 그 사이 다시 스캔된 행은 건너뜀. updated_at은 그대로 두어 정리 작업이 갱신으로 보이지 않게 함
+            c.execute(f'''
+                UPDATE urls SET analysis_json=NULL, updated_at=updated_at
+                WHERE id IN ({placeholders}) AND updated_at < %s
+            ''', list(ids) + [cutoff])
+            cleared = c.rowcount
+            conn.commit()
+        return cleared
+
+    def pool_stats(self):
+        return mysql_pool_stats()
+
+
+# -------------------
+# SQLite (WAL)
+# -------------------
+# 시각은 UTC 고정 길이 문자열로 저장 -> 문자열 비교 순서 = 시간 순서 (커서 / 보존 기간 비교에 그대로 사용)
+SQLITE_TS_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+# PRAGMA user_version에 기록하는 스키마 버전 (같으면 시작 시 스키마 확인 생략)
+SQLITE_SCHEMA_VERSION = 1
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _sqlite_ts(value):
+    return value.strftime(SQLITE_TS_FORMAT)
+
+
+def _parse_sqlite_ts(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+class SQLiteStorage(Storage):
+    """
+    단일 서버용 내장 저장소
+    - WAL 모드: 읽기는 쓰기를 기다리지 않고, 쓰기는 프로세스 간 BEGIN IMMEDIATE로 하나씩 처리
+    - 연결은 스레드마다 하나를 계속 사용 (문장은 연결별 캐시에서 재사용되므로 매번 다시 파싱하지 않음)
+    """
+    name = "SQLite"
+    param = "?"
+
+    # SQLite의 SET 절은 모두 변경 전 값을 보므로 warned_at은 excluded.state로 판단
+    UPSERT_SQL = '''
+        INSERT INTO urls (
+            original_url, final_url, domain, ssl_valid, whois_creation_date,
+            virustotal_score, phishtank_result, label, analysis_json, state,
+            warned_at, created_at, updated_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(original_url) DO UPDATE SET count=count+1, final_url=excluded.final_url,
+        domain=excluded.domain, ssl_valid=excluded.ssl_valid,
+        whois_creation_date=excluded.whois_creation_date,
+        virustotal_score=excluded.virustotal_score,
+        phishtank_result=excluded.phishtank_result,
+        label=excluded.label, analysis_json=excluded.analysis_json,
+        state=CASE
+            WHEN state='warning' OR excluded.state='warning' THEN 'warning'
+            WHEN state='suspected' OR excluded.state='suspected' THEN 'suspected'
+            ELSE 'scanned' END,
+        warned_at=CASE WHEN warned_at IS NULL AND excluded.state='warning' THEN excluded.warned_at ELSE warned_at END,
+        updated_at=excluded.updated_at
+    '''
+
+    # SET 절이 변경 전 reported_count를 보므로 +1한 값으로 직접 비교
+    PROMOTE_SQL = '''
+        UPDATE urls SET
+            reported_count=reported_count+1,
+            state=CASE WHEN reported_count+1 >= ? THEN 'warning' ELSE state END,
+            warned_at=CASE WHEN reported_count+1 >= ? THEN ? ELSE warned_at END,
+            updated_at=?
+        WHERE original_url=? AND state='suspected'
+        RETURNING reported_count, state
+    '''
+
+    WHOIS_PUT_SQL = '''
+        INSERT INTO whois_cache (domain, creation_date, status, expires_at, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(domain) DO UPDATE SET creation_date=excluded.creation_date,
+        status=excluded.status, expires_at=excluded.expires_at, updated_at=excluded.updated_at
+    '''
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._local = threading.local()
+        self._opened = 0
+        self._opened_lock = threading.Lock()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        # fork 이전에 연 연결은 자식 프로세스에서 쓰지 않음
+        if conn is None or self._local.pid != os.getpid():
+            with metrics.stage("db_connect"):
+                conn = sqlite3.connect(
+                    self.path,
+                    timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                    isolation_level=None,  # 트랜잭션은 _write()에서 직접 시작
+                    cached_statements=256
+                )
+                conn.row_factory = sqlite3.Row
+                conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+                conn.execute("PRAGMA journal_mode=WAL")
+                # WAL에서는 NORMAL이어도 DB가 깨지지 않음 (전원 장애 시 마지막 커밋만 유실될 수 있음)
+                conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+            with self._opened_lock:
+                self._opened += 1
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """
+        쓰기 트랜잭션 (처음부터 쓰기 잠금을 잡아 읽기 -> 쓰기 승격 중 SQLITE_BUSY가 나지 않게 함)
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # -------------------
+    # 스키마
+    # -------------------
+    def _create_schema(self):
+        conn = self._connect()
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SQLITE_SCHEMA_VERSION:
+            return
+        with self._write():
+            # 다른 프로세스가 잠금을 기다리는 사이 먼저 끝냈을 수 있으므로 다시 확인
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= SQLITE_SCHEMA_VERSION:
+                return
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS urls (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    original_url TEXT NOT NULL UNIQUE,
+                    final_url TEXT,
+                    domain TEXT,
+                    ssl_valid BOOLEAN,
+                    whois_creation_date TEXT,
+                    virustotal_score TEXT,
+                    phishtank_result BOOLEAN,
+                    label TEXT,
+                    state TEXT NOT NULL DEFAULT 'scanned' CHECK (state IN ('scanned', 'suspected', 'warning')),
+                    count INTEGER DEFAULT 1,
+                    reported_count INTEGER DEFAULT 0,
+                    analysis_json TEXT,
+                    created_at TEXT,
+                    updated_at TEXT,
+                    warned_at TEXT
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS urls_archive (
+                    url_id INTEGER PRIMARY KEY,
+                    original_url TEXT NOT NULL,
+                    analysis_json_z BLOB,
+                    archived_at TEXT
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS whois_cache (
+                    domain TEXT PRIMARY KEY,
+                    creation_date TEXT,
+                    status TEXT,
+                    expires_at INTEGER NOT NULL,
+                    updated_at TEXT
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_state_warned ON urls (state, warned_at, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_state_domain ON urls (state, domain, warned_at, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_state_label ON urls (state, label, warned_at, id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_urls_updated ON urls (updated_at)")
+            self._migrate_legacy_tables(conn)
+            conn.execute(f"PRAGMA user_version={SQLITE_SCHEMA_VERSION}")
+
+    def _migrate_legacy_tables(self, conn):
+        """
+        예전 reports / suspected / warning 테이블(저장소에 포함된 reports.db)을 urls로 옮긴 뒤 *_legacy로 이름 변경
+        """
+        legacy = [
+            t for t in LEGACY_TABLES
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (t,)).fetchone()
+        ]
+        if not legacy:
+            return
+        log.info(f"🔧 기존 테이블 이전 시작: {', '.join(legacy)}")
+        # 예전 created_at(CURRENT_TIMESTAMP, 초 단위 UTC)을 고정 길이 형식으로 맞춤
+        ts = "CASE WHEN length(created_at)=19 THEN created_at || '.000000' ELSE created_at END"
+        # 원래 URL이 아니라 정규화 URL로 합쳐서 옮김 (MySQLStorage._migrate_legacy_tables 참고)
+        placeholders = ", ".join(["?"] * len(LEGACY_COLUMN_NAMES))
+        created_i = LEGACY_COLUMN_NAMES.index("created_at")
+
+        def legacy_rows(table, warned):
+            rows = _merge_legacy_rows(conn.execute(f"SELECT {LEGACY_COLUMNS.replace('created_at', ts)} FROM {table}"))
+            # updated_at (+ warning이면 warned_at)은 예전 created_at으로 채움
+            return [row + (row[created_i],) * (2 if warned else 1) for row in rows]
+
+        if "reports" in legacy:
+            conn.executemany(f'''
+                INSERT INTO urls ({LEGACY_COLUMNS}, updated_at, state) VALUES ({placeholders}, ?, 'scanned')
+                ON CONFLICT(original_url) DO UPDATE SET count=max(count, excluded.count)
+            ''', legacy_rows("reports", False))
+        if "suspected" in legacy:
+            conn.executemany(f'''
+                INSERT INTO urls ({LEGACY_COLUMNS}, updated_at, state) VALUES ({placeholders}, ?, 'suspected')
+                ON CONFLICT(original_url) DO UPDATE SET count=max(count, excluded.count),
+                reported_count=max(reported_count, excluded.reported_count),
+                state=CASE WHEN state='warning' THEN state ELSE 'suspected' END
+            ''', legacy_rows("suspected", False))
+        if "warning" in legacy:
+            conn.executemany(f'''
+                INSERT INTO urls ({LEGACY_COLUMNS}, updated_at, state, warned_at) VALUES ({placeholders}, ?, 'warning', ?)
+                ON CONFLICT(original_url) DO UPDATE SET count=max(count, excluded.count),
+                reported_count=max(reported_count, excluded.reported_count),
+                state='warning', warned_at=coalesce(warned_at, excluded.warned_at)
+            ''', legacy_rows("warning", True))
+        for t in legacy:
+            conn.execute(f"ALTER TABLE {t} RENAME TO {t}_legacy")
+        log.info("✅ 기존 테이블 이전 완료")
+
+    # -------------------
+    # urls
+    # -------------------
+    def upsert_results(self, rows):
+        self.ensure_schema()
+        now = _sqlite_ts(_utcnow())
+        rows = [row + (now if row[-1] == "warning" else None, now, now) for row in rows]
+        with self._write() as conn:
+            conn.executemany(self.UPSERT_SQL, rows)
+
+    def report_url(self, url, threshold):
+        self.ensure_schema()
+        now = _sqlite_ts(_utcnow())
+        with self._write() as conn:
+            row = conn.execute(self.PROMOTE_SQL, (threshold, threshold, now, now, url)).fetchone()
+        return dict(row) if row else None
+
+    def list_warnings(self, limit, cursor=None, since=None, domain=None, label=None):
+        self.ensure_schema()
+        sql, params = self._warning_query(limit, cursor, since, domain, label)
+        rows = [dict(row) for row in self._connect().execute(sql, params)]
+        for row in rows:
+            row["created_at"] = _parse_sqlite_ts(row["created_at"])
+            row["warned_at"] = _parse_sqlite_ts(row["warned_at"])
+        return rows
+
+    def _ts_param(self, value):
+        return _sqlite_ts(value)
+
+    def get_analysis_json(self, url):
+        self.ensure_schema()
+        row = self._connect().execute("SELECT analysis_json FROM urls WHERE original_url=?", (url,)).fetchone()
+        return row["analysis_json"] if row else None
+
+    # -------------------
+    # whois_cache
+    # -------------------
+    def whois_get(self, domain):
+        self.ensure_schema()
+        row = self._connect().execute(
+            "SELECT creation_date, expires_at FROM whois_cache WHERE domain=?", (domain,)
+        ).fetchone()
+        return (row["creation_date"], row["expires_at"]) if row else None
+
+    def whois_put(self, domain, status, creation_date, expires_at):
+        self.ensure_schema()
+        with self._write() as conn:
+            conn.execute(self.WHOIS_PUT_SQL, (domain, creation_date, status, expires_at, _sqlite_ts(_utcnow())))
+
+    # -------------------
+    # 보존 기간 정리 (retention.py)
+    # -------------------
+    def retention_cutoff(self, days):
+        self.ensure_schema()
+        return _sqlite_ts(_utcnow() - timedelta(days=days))
+
+    def retention_candidates(self, cutoff, after, limit):
+        params = [cutoff] + ([after[1], after[1], after[0]] if after else []) + [limit]
+        return [tuple(row) for row in self._connect().execute(self._candidates_query(after), params)]
+
+    def compact_rows(self, ids, cutoff, archive):
+        """
+        MySQL COMPRESS() 대신 zlib로 압축해 보관 (zlib.decompress(analysis_json_z)로 확인)
+        """
+        placeholders = ", ".join(["?"] * len(ids))
+        with self._write() as conn:
+            if archive:
+                rows = conn.execute(f'''
+                    SELECT id, original_url, analysis_json FROM urls
+                    WHERE id IN ({placeholders}) AND analysis_json IS NOT NULL
+                ''', ids).fetchall()
+                now = _sqlite_ts(_utcnow())
+                conn.executemany('''
+                    INSERT INTO urls_archive (url_id, original_url, analysis_json_z, archived_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(url_id) DO UPDATE SET analysis_json_z=excluded.analysis_json_z,
+                    archived_at=excluded.archived_at
+                ''', [
+                    (row["id"], row["original_url"], zlib.compress(row["analysis_json"].encode("utf-8")), now)
+                    for row in rows
+                ])
+            # 그 사이 다시 스캔된 행은 건너뜀 (SQLite는 updated_at을 직접 갱신하므로 그대로 유지됨)
+            cursor = conn.execute(f'''
+                UPDATE urls SET analysis_json=NULL
+                WHERE id IN ({placeholders}) AND updated_at < ?
+            ''', list(ids) + [cutoff])
+            return cursor.rowcount
+
+    def pool_stats(self):
+        # 풀 대신 스레드별 연결 (idle / in_use는 구분하지 않음)
+        with self._opened_lock:
+            return {"size": self._opened, "idle": None, "in_use": None}
+
+
+# -------------------
+# 선택
+# -------------------
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def _sqlite_path(parsed):
+    # sqlite:///reports.db -> reports.db, sqlite:////data/reports.db -> /data/reports.db
+    path = parsed.path[1:] if parsed.path.startswith("/") else parsed.path
+    return path or "reports.db"
+
+
+def create_storage(database_url):
+    parsed = urlparse(database_url)
+    if parsed.scheme in ("mysql", "mysql+mysqlconnector"):
+        return MySQLStorage()
+    if parsed.scheme == "sqlite":
+        return SQLiteStorage(_sqlite_path(parsed))
+    raise ValueError(f"지원하지 않는 DATABASE_URL 스킴: {parsed.scheme}")
+
+
+def get_storage():
+    """
+    DATABASE_URL에 맞는 저장소를 지연 생성 (연결 / 스키마 확인은 첫 사용 시)
+    """
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage(os.getenv("DATABASE_URL") or DEFAULT_DATABASE_URL)
+                log.info(f"🗄️ 저장소: {_storage.name}")
+    return _storage
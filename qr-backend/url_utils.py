@@ -0,0 +1,52 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 목적지가 같은 URL을 하나로 묶기 위해 제거하는 추적용 파라미터
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid",
+    "igshid", "mc_cid", "mc_eid", "_ga", "_gl", "ref_src",
+}
+
+
+# -------------------
+# URL 정규화 (캐시 / 차단 목록 키)
+# -------------------
+def canonicalize_url(url):
+    """
+    대소문자, 기본 포트, 추적 파라미터, 끝 슬래시, fragment 차이를 제거한 URL 반환
+    """
+    raw = url.strip()
+    url = raw if "://" in raw else "http://" + raw
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        # WIFI:S:..., tel:+82-..., BEGIN:VCARD 같은 URL이 아닌 QR 내용은 콜론 뒤를 포트로 읽어 실패함
+        # -> 정규화할 수 없으므로 입력을 그대로 키로 사용
+        return raw
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    try:
+        host = host.encode("idna").decode("ascii")
+    except UnicodeError:
+        pass
+    host = host.lower()
+
+    netloc = host
+    if port and (scheme, port) not in (("http", 80), ("https", 443)):
+        netloc = f"{host}:{port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{userinfo}@{netloc}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from storage import get_storage
+from url_utils import canonicalize_url
+from logger import get_logger
+import blocklist
+import metrics
+
+load_dotenv()
+
+log = get_logger("verdict_cache")
+
+# -------------------
+# 캐시 설정 (TTL 단위: 초)
+# -------------------
+VERDICT_CACHE_SIZE = int(os.getenv("VERDICT_CACHE_SIZE", "2048"))
+VERDICT_TTL = {
+    "안전": int(os.getenv("VERDICT_TTL_SAFE", "86400")),
+    "의심": int(os.getenv("VERDICT_TTL_SUSPICIOUS", "3600")),
+    "위험": int(os.getenv("VERDICT_TTL_DANGER", "21600")),
+}
+# 타임아웃 / VirusTotal 한도 초과로 일부 검사가 빠진 결과는 짧게만 보관
+VERDICT_TTL_PARTIAL = int(os.getenv("VERDICT_TTL_PARTIAL", "60"))
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # key -> (expires_at, result)
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "refreshes": 0}
+
+
+def _ttl_for(result):
+    if result.get("partial") or result.get("virustotal_pending"):
+        return VERDICT_TTL_PARTIAL
+    return VERDICT_TTL.get(result.get("label"), VERDICT_TTL_PARTIAL)
+
+
+# -------------------
+# 1단계: 프로세스 내 LRU
+# -------------------
+def _memory_get(key, now):
+    with _lock:
+        entry = _entries.get(key)
+        if not entry:
+            return None
+        expires_at, result = entry
+        if expires_at <= now:
+            del _entries[key]
+            return None
+        _entries.move_to_end(key)
+        return result
+
+
+def _memory_put(key, result, expires_at):
+    with _lock:
+        _entries[key] = (expires_at, result)
+        _entries.move_to_end(key)
+        while len(_entries) > VERDICT_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+# -------------------
+# 2단계: urls.analysis_json
+# -------------------
+def _db_get(key, now):
+    try:
+        analysis_json = get_storage().get_analysis_json(key)
+    except Exception as e:
+        metrics.count_error("verdict_cache_db")
+        log.error(f"❌ verdict_cache DB 조회 오류: {e}")
+        return None
+
+    if not analysis_json:
+        return None
+    try:
+        result = json.loads(analysis_json)
+    except ValueError:
+        return None
+
+    # analyzed_at이 없는 예전 행은 신선도를 알 수 없으므로 사용하지 않음
+    analyzed_at = result.get("analyzed_at")
+    if not analyzed_at or analyzed_at + _ttl_for(result) <= now:
+        return None
+    return result
+
+
+def get_or_analyze(url, analyze_fn, refresh=False):
+    """
+    캐시된 판정이 있으면 반환하고, 없으면 analyze_fn(url)로 분석 후 캐시에 저장
+    :param refresh: True면 캐시를 무시하고 다시 분석
+    :return: (분석 결과, "memory" | "db" | "miss")
+    """
+    key = canonicalize_url(url)
+    now = time.time()
+
+    # 차단 목록에 새로 오른 URL은 캐시에 남은 이전 판정(예: 안전)보다 우선하므로 캐시를 건너뛰고 다시 판정
+    # (analyze_url은 차단 목록 적중 시 네트워크 검사 없이 바로 '위험'을 반환)
+    if refresh:
+        with _lock:
+            _stats["refreshes"] += 1
+    elif not blocklist.contains(url):
+        result = _memory_get(key, now)
+        if result is not None:
+            with _lock:
+                _stats["memory_hits"] += 1
+            return dict(result, original_url=url, canonical_url=key), "memory"
+
+        result = _db_get(key, now)
+        if result is not None:
+            _memory_put(key, result, result["analyzed_at"] + _ttl_for(result))
+            with _lock:
+                _stats["db_hits"] += 1
+            return dict(result, original_url=url, canonical_url=key), "db"
+
+    with _lock:
+        _stats["misses"] += 1
+
+    result = analyze_fn(url)
+    result["original_url"] = url
+    result["canonical_url"] = key
+    result["analyzed_at"] = now
+    if "error" not in result:
+        _memory_put(key, result, now + _ttl_for(result))
+    return dict(result), "miss"
+
+
+def invalidate(url):
+    with _lock:
+        _entries.pop(canonicalize_url(url), None)
+
+
+def stats():
+    with _lock:
+        data = dict(_stats, size=len(_entries))
+    lookups = data["memory_hits"] + data["db_hits"] + data["misses"]
+    data["hit_rate"] = round((data["memory_hits"] + data["db_hits"]) / lookups, 4) if lookups else 0.0
+    return data
@@ -0,0 +1,207 @@
+import os
+import time
+import base64
+import threading
+from dotenv import load_dotenv
+from http_client import get_session
+from logger import get_logger
+
+load_dotenv()
+
+log = get_logger("virustotal")
+
+# -------------------
+# VirusTotal 설정
+# -------------------
+VIRUSTOTAL_API_KEY = os.getenv("VIRUSTOTAL_API_KEY")
+VIRUSTOTAL_API_URL = os.getenv("VIRUSTOTAL_API_URL", "https://www.virustotal.com/api/v3").rstrip("/")
+VIRUSTOTAL_TIMEOUT = float(os.getenv("VIRUSTOTAL_TIMEOUT", "6"))
+# 분당 요청 한도 (공개 API 키는 분당 4회). gunicorn 워커가 여러 개면 워커 수로 나눠서 설정
+VT_RATE_PER_MIN = float(os.getenv("VT_RATE_PER_MIN", "4"))
+VT_BURST = int(os.getenv("VT_BURST", "4"))
+# 동시에 진행하는 API 호출 수 (0이면 제한 없음). 빈 자리가 timeout 안에 나지 않으면 VT_PENDING
+VT_CONCURRENCY = int(os.getenv("VT_CONCURRENCY", "0"))
+# 조회 결과 캐시 시간 (단위: 초)
+VT_CACHE_TTL = int(os.getenv("VT_CACHE_TTL", "3600"))
+VT_NOT_FOUND_TTL = int(os.getenv("VT_NOT_FOUND_TTL", "600"))
+VT_CACHE_SIZE = int(os.getenv("VT_CACHE_SIZE", "5000"))
+# 429 응답에 Retry-After가 없을 때의 대기 시간 (연속 429마다 두 배, 최대 VT_BACKOFF_MAX)
+VT_BACKOFF_BASE = float(os.getenv("VT_BACKOFF_BASE", "15"))
+VT_BACKOFF_MAX = float(os.getenv("VT_BACKOFF_MAX", "600"))
+
+# 한도 초과로 조회하지 못했을 때의 점수 문자열 (요청을 막지 않고 이 값으로 응답)
+VT_PENDING = "pending: VirusTotal quota exhausted"
+VT_NOT_FOUND = "URL not found in VT"
+
+
+def is_pending(score):
+    return isinstance(score, str) and score.startswith("pending")
+
+
+def url_id(url):
+    # VirusTotal v3 URL 식별자: 패딩 없는 URL-safe Base64
+    return base64.urlsafe_b64encode(url.encode("utf-8")).decode().strip("=")
+
+
+class TokenBucket:
+    """
+    rate_per_min 속도로 채워지는 토큰 버킷 (토큰이 없으면 기다리지 않고 False)
+    """
+
+    def __init__(self, rate_per_min, burst):
+        self.rate = rate_per_min / 60.0
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+_bucket = TokenBucket(VT_RATE_PER_MIN, VT_BURST)
+_call_slots = threading.BoundedSemaphore(VT_CONCURRENCY) if VT_CONCURRENCY > 0 else None
+_lock = threading.Lock()
+_cache = {}       # url_id -> (expires_at, score)
+_inflight = {}    # url_id -> threading.Event
+_cooldown_until = 0.0
+_consecutive_429 = 0
+_stats = {"hits": 0, "misses": 0, "requests": 0, "pending": 0, "rate_limited": 0, "errors": 0}
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def _cache_get(vt_id):
+    with _lock:
+        entry = _cache.get(vt_id)
+        if entry and entry[0] > time.monotonic():
+            _stats["hits"] += 1
+            return entry[1]
+        return None
+
+
+def _cache_put(vt_id, score, ttl):
+    with _lock:
+        _cache[vt_id] = (time.monotonic() + ttl, score)
+        if len(_cache) > VT_CACHE_SIZE:
+            _cache.pop(next(iter(_cache)))
+
+
+def _backoff(retry_after):
+    global _cooldown_until, _consecutive_429
+    with _lock:
+        _consecutive_429 += 1
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = min(VT_BACKOFF_BASE * (2 ** (_consecutive_429 - 1)), VT_BACKOFF_MAX)
+        _cooldown_until = max(_cooldown_until, time.monotonic() + delay)
+        _stats["rate_limited"] += 1
+    log.warning(f"⚠️ VirusTotal 429 -> {delay:.0f}초 동안 조회 중단")
+
+
+def _fetch(vt_id, timeout):
+    if _call_slots is None:
+        return _fetch_now(vt_id, timeout)
+    if not _call_slots.acquire(timeout=timeout):
+        _count("pending")
+        return VT_PENDING
+    try:
+        return _fetch_now(vt_id, timeout)
+    finally:
+        _call_slots.release()
+
+
+def _fetch_now(vt_id, timeout):
+    """
+    실제 API 호출 (한도 확인 후) -> 점수 문자열
+    """
+    global _consecutive_429
+    if time.monotonic() < _cooldown_until or not _bucket.try_acquire():
+        _count("pending")
+        return VT_PENDING
+
+    _count("requests")
+    headers = {"x-apikey": VIRUSTOTAL_API_KEY}
+    # VirusTotal v3 API: GET /urls/{url_id}
+    response = get_session().get(f"{VIRUSTOTAL_API_URL}/urls/{vt_id}", headers=headers, timeout=timeout)
+
+    if response.status_code == 429:
+        _backoff(response.headers.get("Retry-After"))
+        _count("pending")
+        return VT_PENDING
+
+    with _lock:
+        _consecutive_429 = 0
+
+    if response.status_code == 200:
+        data = response.json()
+        stats = data["data"]["attributes"]["last_analysis_stats"]
+        malicious = stats.get("malicious", 0)
+        suspicious = stats.get("suspicious", 0)
+        harmless = stats.get("harmless", 0)
+        undetected = stats.get("undetected", 0)
+        score = f"{malicious} malicious / {suspicious} suspicious / {harmless} harmless / {undetected} undetected"
+        _cache_put(vt_id, score, VT_CACHE_TTL)
+        return score
+    elif response.status_code == 404:
+        _cache_put(vt_id, VT_NOT_FOUND, VT_NOT_FOUND_TTL)
+        return VT_NOT_FOUND
+    else:
+        _count("errors")
+        return f"error: {response.status_code}"
+
+
+def check_virustotal(url, timeout=None):
+    """
+    VirusTotal에서 URL 결과를 조회하는 함수
+    - url_id 기준으로 결과를 캐시하고, 같은 URL의 동시 조회는 한 번의 호출을 공유
+    - 한도 초과 / 429 대기 중에는 기다리지 않고 VT_PENDING 반환
+    """
+    if not VIRUSTOTAL_API_KEY:
+        return "API key not set"
+
+    timeout = timeout or VIRUSTOTAL_TIMEOUT
+    vt_id = url_id(url)
+
+    score = _cache_get(vt_id)
+    if score is not None:
+        return score
+    with _lock:
+        event = _inflight.get(vt_id)
+        leader = event is None
+        if leader:
+            event = _inflight[vt_id] = threading.Event()
+            _stats["misses"] += 1
+    if not leader:
+        # 같은 URL을 조회 중인 요청이 있으면 그 결과를 기다림
+        event.wait(timeout)
+        score = _cache_get(vt_id)
+        # 앞선 호출이 캐시할 수 없는 결과(pending / 오류)로 끝났거나 아직 진행 중
+        return score if score is not None else VT_PENDING
+
+    try:
+        return _fetch(vt_id, timeout)
+    except Exception as e:
+        _count("errors")
+        return f"error: {str(e)}"
+    finally:
+        with _lock:
+            _inflight.pop(vt_id, None)
+        event.set()
+
+
+def stats():
+    with _lock:
+        cooldown = max(0.0, _cooldown_until - time.monotonic())
+        return dict(_stats, cached=len(_cache), cooldown_seconds=round(cooldown, 1))
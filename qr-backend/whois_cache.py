@@ -0,0 +1,170 @@
+import os
+import time
+import socket
+import threading
+import whois
+from whois.parser import WhoisEntry
+import tldextract
+from dotenv import load_dotenv
+from storage import get_storage
+from logger import get_logger
+import metrics
+
+load_dotenv()
+
+log = get_logger("whois_cache")
+
+# -------------------
+# WHOIS 캐시 설정 (단위: 초)
+# -------------------
+WHOIS_TTL = int(os.getenv("WHOIS_TTL", str(30 * 24 * 3600)))
+# 조회 실패 / 생성일 없음 응답은 짧게만 기억
+WHOIS_NEGATIVE_TTL = int(os.getenv("WHOIS_NEGATIVE_TTL", "900"))
+WHOIS_CACHE_SIZE = int(os.getenv("WHOIS_CACHE_SIZE", "10000"))
+# 지정하면 모든 조회를 이 WHOIS 서버(host:port)로 보냄 (WHOIS 프록시 / 벤치마크용 로컬 응답기)
+WHOIS_SERVER = os.getenv("WHOIS_SERVER")
+WHOIS_SOCKET_TIMEOUT = float(os.getenv("WHOIS_SOCKET_TIMEOUT", "8"))
+# 동시에 진행하는 WHOIS 조회 수 (0이면 제한 없음, 대량 스캔 시 WHOIS 서버 차단 방지)
+WHOIS_CONCURRENCY = int(os.getenv("WHOIS_CONCURRENCY", "0"))
+
+# 패키지에 포함된 Public Suffix List 스냅샷만 사용 (실행 중 네트워크 접근 없음)
+# 비공개 접미사(github.io, blogspot.com, pages.dev 등)도 포함해 사용자별 하위 도메인을 각각의 도메인으로 취급
+# (포함하지 않으면 foo.github.io가 github.io의 오래된 생성일을 받아 안전으로 판정될 수 있음)
+_extract = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None, include_psl_private_domains=True)
+
+_lock = threading.Lock()
+_entries = {}    # domain -> (expires_at, creation_date)
+_inflight = {}   # domain -> threading.Event
+_stats = {"memory_hits": 0, "db_hits": 0, "queries": 0, "query_errors": 0}
+_query_slots = threading.BoundedSemaphore(WHOIS_CONCURRENCY) if WHOIS_CONCURRENCY > 0 else None
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+
+def registrable_domain(host):
+    """
+    호스트를 등록 가능 도메인(eTLD+1)으로 축약
+    예) a.example.com, example.com:443 -> example.com / IP, localhost -> None
+    """
+    if not host:
+        return None
+    host = host.rsplit("@", 1)[-1].split(":", 1)[0].strip().rstrip(".").lower()
+    domain = _extract(host).registered_domain
+    return domain or None
+
+
+def _whois_from_server(domain):
+    host, _, port = WHOIS_SERVER.rpartition(":")
+    with socket.create_connection((host, int(port)), timeout=WHOIS_SOCKET_TIMEOUT) as sock:
+        sock.sendall(domain.encode("idna") + b"\r\n")
+        chunks = []
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return WhoisEntry.load(domain, b"".join(chunks).decode("utf-8", errors="replace"))
+
+
+def _query_whois(domain):
+    """
+    실제 WHOIS 조회 -> ("ok" | "nodata" | "error", 생성일 문자열)
+    """
+    if _query_slots is None:
+        return _query_whois_now(domain)
+    with _query_slots:
+        return _query_whois_now(domain)
+
+
+def _query_whois_now(domain):
+    try:
+        w = _whois_from_server(domain) if WHOIS_SERVER else whois.whois(domain)
+        creation_date = w.creation_date
+        if isinstance(creation_date, list):
+            creation_date = creation_date[0]
+        if creation_date:
+            return "ok", creation_date.strftime("%Y-%m-%d %H:%M:%S")
+        return "nodata", None
+    except Exception:
+        return "error", None
+
+
+def _db_get(domain, now):
+    try:
+        row = get_storage().whois_get(domain)
+    except Exception as e:
+        metrics.count_error("whois_cache_db")
+        log.error(f"❌ whois_cache DB 조회 오류: {e}")
+        return None
+
+    if not row or row[1] <= now:
+        return None
+    creation_date, expires_at = row
+    return expires_at, creation_date
+
+
+def _db_put(domain, status, creation_date, expires_at):
+    try:
+        get_storage().whois_put(domain, status, creation_date, expires_at)
+    except Exception as e:
+        metrics.count_error("whois_cache_db")
+        log.error(f"❌ whois_cache DB 저장 오류: {e}")
+
+
+def lookup_creation_date(host):
+    """
+    등록 도메인 기준으로 WHOIS 생성일 조회 (메모리 -> DB -> WHOIS 순)
+    같은 도메인에 대한 동시 조회는 한 번의 WHOIS 요청을 함께 기다림
+    """
+    domain = registrable_domain(host)
+    if not domain:
+        return None
+
+    while True:
+        now = int(time.time())
+        with _lock:
+            entry = _entries.get(domain)
+            if entry and entry[0] > now:
+                _stats["memory_hits"] += 1
+                return entry[1]
+            event = _inflight.get(domain)
+            if event is None:
+                event = _inflight[domain] = threading.Event()
+                break
+        # 다른 스레드가 조회 중이면 끝날 때까지 기다린 뒤 메모리 캐시를 다시 확인
+        event.wait()
+
+    try:
+        cached = _db_get(domain, now)
+        if cached:
+            expires_at, creation_date = cached
+            _count("db_hits")
+        else:
+            status, creation_date = _query_whois(domain)
+            _count("queries")
+            if status == "error":
+                _count("query_errors")
+            ttl = WHOIS_TTL if status == "ok" else WHOIS_NEGATIVE_TTL
+            expires_at = int(time.time()) + ttl
+            _db_put(domain, status, creation_date, expires_at)
+
+        with _lock:
+            _entries[domain] = (expires_at, creation_date)
+            if len(_entries) > WHOIS_CACHE_SIZE:
+                _entries.pop(next(iter(_entries)))
+        return creation_date
+    finally:
+        with _lock:
+            _inflight.pop(domain, None)
+        event.set()
+
+
+def stats():
+    with _lock:
+        data = dict(_stats, size=len(_entries))
+    lookups = data["memory_hits"] + data["db_hits"] + data["queries"]
+    data["hit_rate"] = round((data["memory_hits"] + data["db_hits"]) / lookups, 4) if lookups else 0.0
+    return data
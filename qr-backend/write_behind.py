@@ -0,0 +1,133 @@
+import os
+import time
+import queue
+import atexit
+import threading
+from logger import get_logger
+import metrics
+
+log = get_logger("write_behind")
+
+
+class WriteBehindQueue:
+    """
+    분석 결과를 제한된 크기의 큐에 모았다가 백그라운드 스레드에서 일괄 저장
+    - put(): 큐가 가득 차면 False를 반환 (호출 측에서 직접 저장)
+    - close(): 남은 항목을 모두 저장한 뒤 종료 (프로세스 종료 시 자동 호출)
+    """
+
+    def __init__(self, flush_fn, maxsize=1000, batch_size=100, flush_interval=0.5, max_retries=3):
+        self.flush_fn = flush_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._stats = {"enqueued": 0, "flushed": 0, "dropped": 0, "rejected": 0, "batches": 0}
+        atexit.register(self.close)
+
+    def _ensure_started(self):
+        # gunicorn fork 이후에는 워커 프로세스에서 새로 스레드를 시작
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        with self._lock:
+            if self._thread is None or self._pid != pid:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+                self._pid = pid
+
+    def put(self, item):
+        if self._stop.is_set():
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            return False
+        with self._lock:
+            self._stats["enqueued"] += 1
+        return True
+
+    def depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, depth=self.depth(), capacity=self._queue.maxsize)
+
+    def _take_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self.flush_fn(batch)
+                with self._lock:
+                    self._stats["flushed"] += len(batch)
+                    self._stats["batches"] += 1
+                return
+            except Exception as e:
+                metrics.count_error("write_behind")
+                if attempt == self.max_retries:
+                    log.exception(f"❌ write-behind 저장 실패 ({attempt}/{self.max_retries}): {e}")
+                else:
+                    log.warning(f"❌ write-behind 저장 실패 ({attempt}/{self.max_retries}): {e}")
+                    time.sleep(0.2 * attempt)
+        if len(batch) > 1:
+            self._flush_each(batch)
+            return
+        self._drop(batch[0], "재시도 초과")
+
+    def _flush_each(self, batch):
+        # 일괄 저장은 한 행만 잘못돼도(예: 길이 초과 URL) 전체가 실패하므로 한 건씩 저장해 실패한 행만 버림
+        flushed = 0
+        for item in batch:
+            try:
+                self.flush_fn([item])
+                flushed += 1
+            except Exception as e:
+                metrics.count_error("write_behind")
+                self._drop(item, e)
+        with self._lock:
+            self._stats["flushed"] += flushed
+            self._stats["batches"] += 1
+        log.warning(f"⚠️ write-behind 일괄 저장 실패 -> 개별 저장 {flushed}/{len(batch)}건 성공")
+
+    def _drop(self, item, reason):
+        url = item.get("original_url") if isinstance(item, dict) else None
+        log.error(f"🗑️ write-behind 저장 포기: {(url or repr(item))[:200]} ({reason})")
+        with self._lock:
+            self._stats["dropped"] += 1
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._take_batch()
+            if batch:
+                self._flush(batch)
+
+    def close(self, timeout=10):
+        """
+        새 항목을 막고 큐에 남은 결과를 모두 저장한 뒤 스레드 종료
+        """
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and self._pid == os.getpid() and thread.is_alive():
+            thread.join(timeout)
+            if thread.is_alive():
+                log.warning(f"⚠️ write-behind 종료 대기 시간 초과, 남은 항목 {self.depth()}건")
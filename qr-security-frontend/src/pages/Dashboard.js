@@ -1,30 +1,71 @@
 import React, { useEffect, useState } from "react";
 import axios from "axios";
 
+const WARNING_API_URL = "http://localhost:5000/get_warning";
+const WARNING_CACHE_KEY = "warningCache.v2";
+const WARNING_PAGE_SIZE = 500;
+
+const toRows = (items) =>
+  items.map((item, index) => ({
+    id: index + 1,
+    url: item.original_url,
+    risk: item.label,
+    domain: item.domain,
+    ssl_valid: item.ssl_valid,
+    whois_creation_date: item.whois_creation_date,
+    virustotal_score: item.virustotal_score,
+    phishtank_result: item.phishtank_result,
+  }));
+
 function Dashboard() {
   const [reports, setReports] = useState([]);
   const [selectedReport, setSelectedReport] = useState(null); // 상세보기용 상태
 
   useEffect(() => {
+    // 이전에 받은 목록은 브라우저에 보관하고, 그 이후에 추가된 행만 서버에서 가져옴
+    const cached = JSON.parse(localStorage.getItem(WARNING_CACHE_KEY) || "null");
+    let items = cached?.items || [];
+    let latestCursor = cached?.latestCursor || null;
+    if (items.length) setReports(toRows(items));
+
+    const fetchPage = (params) =>
+      axios.get(WARNING_API_URL, { params }).then((res) => res.data);
+
+    const load = async () => {
+      if (latestCursor) {
+        const fresh = [];
+        let since = latestCursor;
+        let hasMore = true;
+        while (hasMore) {
+          const page = await fetchPage({ since, limit: WARNING_PAGE_SIZE });
+          fresh.push(...page.items);
+          latestCursor = page.latest_cursor || latestCursor;
+          since = page.next_cursor;
+          hasMore = page.has_more;
+        }
+        if (!fresh.length) return;
+        items = [...fresh.reverse(), ...items];
+      } else {
+        // 처음 방문: 최신순으로 끝까지 이어서 받음 (latest_cursor는 첫 페이지에만 담겨 옴)
+        items = [];
+        let cursor = null;
+        let hasMore = true;
+        while (hasMore) {
+          const page = await fetchPage(cursor ? { cursor, limit: WARNING_PAGE_SIZE } : { limit: WARNING_PAGE_SIZE });
+          items.push(...page.items);
+          if (!cursor) latestCursor = page.latest_cursor;
+          cursor = page.next_cursor;
+          hasMore = page.has_more && Boolean(cursor);
+        }
+      }
+      localStorage.setItem(WARNING_CACHE_KEY, JSON.stringify({ items, latestCursor }));
+      setReports(toRows(items));
+    };
+
     // Flask 서버에서 warning 데이터 가져오기
-    axios
-      .get("http://localhost:5000/get_warning")
-      .then((res) => {
-        const data = res.data.map((item, index) => ({
-          id: index + 1,
-          url: item.original_url,
-          risk: item.label,
-          domain: item.domain,
-          ssl_valid: item.ssl_valid,
-          whois_creation_date: item.whois_creation_date,
-          virustotal_score: item.virustotal_score,
-          phishtank_result: item.phishtank_result,
-        }));
-        setReports(data);
-      })
-      .catch((err) => {
-        console.error("대시보드 데이터 로딩 오류:", err);
-      });
+    load().catch((err) => {
+      console.error("대시보드 데이터 로딩 오류:", err);
+    });
   }, []);
 
   const getColor = (risk) => {